@@ -0,0 +1 @@
+"""Benchmarks for the app's hot paths. Run from the repo root, e.g. python -m benchmarks.bench_blocker"""
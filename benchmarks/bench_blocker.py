@@ -0,0 +1,118 @@
+"""
+Per-scan cost of blocked-app enforcement with 1,000 fake processes.
+
+Compares the old full psutil.process_iter() scan with ProcessWatcher, which
+only looks up names for pids that are new since the last scan. Besides wall
+time it counts name lookups, the part that costs a syscall per process on a
+real machine.
+
+    python -m benchmarks.bench_blocker [--procs 1000] [--scans 200] [--churn 5]
+"""
+import argparse
+import random
+import sys
+import time
+import types
+
+class _FakeError(Exception):
+    pass
+
+class FakePsutil(types.ModuleType):
+    """Just enough of psutil for the blocker: pids(), Process(pid).name()/.kill(), process_iter()."""
+
+    NoSuchProcess = _FakeError
+    AccessDenied = _FakeError
+
+    def __init__(self, n_procs, seed=0):
+        super().__init__("psutil")
+        self._rng = random.Random(seed)
+        self._next_pid = 100
+        self.procs = {}
+        self.name_lookups = 0
+        for _ in range(n_procs):
+            self.spawn()
+
+    def spawn(self, name=None):
+        pid = self._next_pid
+        self._next_pid += 4
+        self.procs[pid] = name or f"proc{self._rng.randrange(300)}.exe"
+        return pid
+
+    def churn(self, n):
+        """Replace n random processes with new ones, like a busy workstation."""
+        for pid in self._rng.sample(list(self.procs), min(n, len(self.procs))):
+            del self.procs[pid]
+            self.spawn()
+
+    def pids(self):
+        return list(self.procs)
+
+    def Process(self, pid):
+        fake = self
+
+        class _Proc:
+            def name(self):
+                fake.name_lookups += 1
+                try:
+                    return fake.procs[pid]
+                except KeyError:
+                    raise fake.NoSuchProcess(pid)
+
+            def kill(self):
+                if fake.procs.pop(pid, None) is None:
+                    raise fake.NoSuchProcess(pid)
+
+        return _Proc()
+
+    def process_iter(self, attrs):
+        for pid in list(self.procs):
+            proc = self.Process(pid)
+            proc.info = {"pid": pid, "name": proc.name()}
+            yield proc
+
+def full_scan(fake, blocked_apps):
+    """The enforcement loop as it was before ProcessWatcher."""
+    blocked = {app.lower() for app in blocked_apps}
+    return [proc.info["pid"] for proc in fake.process_iter(["pid", "name"])
+            if (proc.info["name"] or "").lower() in blocked]
+
+def run(n_procs=1000, scans=200, churn=5):
+    fake = FakePsutil(n_procs)
+    sys.modules.setdefault("psutil", fake)
+    import process_watcher
+    process_watcher.psutil = fake
+
+    blocked_apps = ["Discord.exe", "steam.exe"]
+    results = {}
+
+    fake.name_lookups = 0
+    start = time.perf_counter()
+    for _ in range(scans):
+        fake.churn(churn)
+        full_scan(fake, blocked_apps)
+    results["full_scan"] = {
+        "us_per_scan": (time.perf_counter() - start) / scans * 1e6,
+        "name_lookups_per_scan": fake.name_lookups / scans,
+    }
+
+    watcher = process_watcher.ProcessWatcher()
+    watcher.scan(blocked_apps, full=True)
+    fake.name_lookups = 0
+    start = time.perf_counter()
+    for _ in range(scans):
+        fake.churn(churn)
+        watcher.scan(blocked_apps)
+    results["process_watcher"] = {
+        "us_per_scan": (time.perf_counter() - start) / scans * 1e6,
+        "name_lookups_per_scan": fake.name_lookups / scans,
+    }
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--procs", type=int, default=1000)
+    parser.add_argument("--scans", type=int, default=200)
+    parser.add_argument("--churn", type=int, default=5, help="processes replaced between scans")
+    args = parser.parse_args()
+    for name, stats in run(args.procs, args.scans, args.churn).items():
+        print(f"{name:16s} {stats['us_per_scan']:9.1f} us/scan  {stats['name_lookups_per_scan']:7.1f} name lookups/scan")
@@ -0,0 +1,87 @@
+"""
+Memory held per buffered log event: the old dict of formatted strings, the
+tuple of ints and ids, and the packed EventBuffer.
+
+Uses tracemalloc to count the bytes and blocks still allocated after
+buffering N events, divided by N. App names and titles come from the
+tracker in every version, so their strings are created before measuring.
+
+    python -m benchmarks.bench_event_memory [--events 100000]
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+from logformat import EventBuffer, wall_seconds
+from strtable import strings
+
+def make_events(n_events):
+    t = datetime(2026, 1, 5, 9)
+    apps = [f"app{i}.exe" for i in range(20)]
+    titles = [f"Document {i} - Editor" for i in range(200)]
+    events = []
+    for i in range(n_events):
+        end = t + timedelta(seconds=1)
+        events.append((t, end, apps[i % 20], titles[i % 200], "work"))
+        t = end
+    return events
+
+def buffer_dicts(events):
+    # What log_event used to keep until the flush
+    buf = []
+    for start, end, app, title, phase in events:
+        buf.append({
+            "timestamp_start": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp_end": end.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_secs": int((end - start).total_seconds()),
+            "app_name": app,
+            "window_title": title,
+            "phase": phase,
+        })
+    return buf
+
+def buffer_tuples(events):
+    buf = []
+    for start, end, app, title, phase in events:
+        buf.append((wall_seconds(start), wall_seconds(end), int((end - start).total_seconds()),
+                    strings.intern(app), strings.intern(title), phase))
+    return buf
+
+def buffer_packed(events):
+    buf = EventBuffer()
+    for start, end, app, title, phase in events:
+        buf.append(wall_seconds(start), wall_seconds(end), int((end - start).total_seconds()),
+                   strings.intern(app), strings.intern(title), phase)
+    return buf
+
+def measure(build, events):
+    """(bytes, blocks) still allocated per event once the buffer is built."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    buf = build(events)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in diff)
+    blocks = sum(stat.count_diff for stat in diff)
+    del buf
+    return size / len(events), blocks / len(events)
+
+def run(n_events=100000):
+    # Intern into a throwaway table so the real one is never touched
+    strings.reset(os.path.join(tempfile.mkdtemp(), "strings.csv"))
+    events = make_events(n_events)
+    buffer_tuples(events[:200])  # table entries exist before measuring
+    results = {}
+    for name, build in (("dict", buffer_dicts), ("tuple", buffer_tuples), ("packed", buffer_packed)):
+        results[name] = measure(build, events)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+    for name, (size, blocks) in run(args.events).items():
+        print(f"{name:7s} {size:7.1f} bytes/event  {blocks:5.2f} blocks/event")
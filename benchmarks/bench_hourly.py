@@ -0,0 +1,70 @@
+"""
+Hourly bucketing: pure-Python per-row fold vs the NumPy-vectorized fold.
+
+Builds a day of synthetic rows, folds it both ways, checks the rollups are
+identical and prints the timings.
+
+    python -m benchmarks.bench_hourly [--rows 200000] [--apps 25] [--legacy]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import logger
+from logformat import encode_record, parse_row, wall_seconds
+
+def make_rows(n_rows, n_apps, seed=0, legacy=False):
+    rng = random.Random(seed)
+    t = datetime(2026, 1, 5)
+    rows = []
+    for _ in range(n_rows):
+        # Mostly 1-30 s samples with the odd long interval crossing hours
+        secs = rng.choice((1, 1, 2, 5, 30, rng.randint(1, 7200)))
+        end = t + timedelta(seconds=secs)
+        if legacy:
+            stamps = [t.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")]
+        else:
+            stamps = [str(wall_seconds(t)), str(wall_seconds(end))]
+        rows.append(stamps + [
+            str(secs),
+            f"app{rng.randrange(n_apps)}.exe",
+            "title",
+            rng.choice(("work", "break", "unscheduled")),
+        ])
+        t = end
+    return rows
+
+def _normalize(day):
+    return day["phases"], day["apps"], day["titles"], [dict(h) for h in day["hours"]]
+
+def run(n_rows=200000, n_apps=25, legacy=False):
+    if logger._numpy() is None:
+        raise SystemExit("numpy is not installed; nothing to compare")
+    rows = make_rows(n_rows, n_apps, legacy=legacy)
+    version = 1 if legacy else 2
+
+    start = time.perf_counter()
+    slow = logger._new_day()
+    for values in rows:
+        logger._add_to_rollup(slow, encode_record(parse_row(values, version)))
+    python_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = logger._new_day()
+    logger._fold_rows_numpy(fast, rows, version)
+    numpy_secs = time.perf_counter() - start
+
+    if _normalize(slow) != _normalize(fast):
+        raise SystemExit("vectorized rollup does not match the per-row fold")
+    return {"rows": n_rows, "python_s": python_secs, "numpy_s": numpy_secs,
+            "speedup": python_secs / numpy_secs if numpy_secs else float("inf")}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--apps", type=int, default=25)
+    parser.add_argument("--legacy", action="store_true", help="use v1 timestamp strings")
+    args = parser.parse_args()
+    r = run(args.rows, args.apps, args.legacy)
+    print(f"{r['rows']} rows: python {r['python_s']:.3f}s  numpy {r['numpy_s']:.3f}s  ({r['speedup']:.1f}x)")
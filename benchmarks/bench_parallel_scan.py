@@ -0,0 +1,67 @@
+"""
+Catching up rollups from raw segments: serial versus the parallel scan.
+
+Generates v3 segments in a temporary directory, then rebuilds every day's
+rollup from nothing, once with the serial per-day read and once per worker
+count with logger._catch_up (newline-aligned byte ranges folded by a
+process pool). Every parallel result is checked against the serial one.
+
+    python -m benchmarks.bench_parallel_scan [--days 30] [--interval 1] [--max-workers N]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import logger
+from strtable import strings
+from benchmarks.generate_log import generate_records, write_segments
+
+def _rebuild(days, workers=None):
+    """Seconds to bring every day's rollup up to date from the start of its segment."""
+    with logger.rollup_lock:
+        logger._tails.clear()
+        start = time.perf_counter()
+        if workers is not None:
+            logger._catch_up(days, workers=workers, min_bytes=0)
+        rollups = {day: logger._get_day(day) for day in days}
+        secs = time.perf_counter() - start
+        logger._dirty_days.clear()
+    return secs, rollups
+
+def run(n_days=30, interval=1, max_workers=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    workdir = tempfile.mkdtemp(prefix="scan-bench-")
+    try:
+        logger.LOG_DIR = os.path.join(workdir, "usage")
+        strings.reset(os.path.join(workdir, "usage_strings.csv"))
+        rows = write_segments(generate_records(n_days, interval), logger.LOG_DIR, strings)
+        days = logger.segment_days()
+        size = sum(os.path.getsize(logger._segment_path(day)) for day in days)
+
+        serial_secs, expected = _rebuild(days)
+        results = {"rows": rows, "mb": size / 1e6, "serial_s": serial_secs, "workers": {}}
+        workers = 1
+        while True:
+            secs, rollups = _rebuild(days, workers)
+            if rollups != expected:
+                raise SystemExit(f"parallel scan with {workers} workers does not match the serial rollups")
+            results["workers"][workers] = secs
+            if workers >= max_workers:
+                break
+            workers = min(workers * 2, max_workers)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=1, help="seconds per generated row")
+    parser.add_argument("--max-workers", type=int, help="default: one per CPU")
+    args = parser.parse_args()
+    results = run(args.days, args.interval, args.max_workers)
+    print(f"{results['rows']} rows, {results['mb']:.1f} MB: serial {results['serial_s']:.2f}s")
+    for workers, secs in results["workers"].items():
+        print(f"{workers:3d} workers {secs:6.2f}s  ({results['serial_s'] / secs:.1f}x)")
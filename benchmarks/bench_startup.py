@@ -0,0 +1,108 @@
+"""
+Startup cost: module import time of main.py and time to the first frame of
+the timer window, checked against a budget.
+
+    python -m benchmarks.bench_startup [--runs 3] [--json]
+
+Import time comes from `python -X importtime -c "import main"`; time to
+first frame is measured from process spawn until the root window's <Map>
+event. Exits non-zero if the median of either is over STARTUP_BUDGET_MS.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Budgets to track between releases (milliseconds, median of the runs)
+STARTUP_BUDGET_MS = {
+    "import_main": 300,
+    "first_frame": 1000,
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child process: build the real window and exit as soon as it is mapped
+_FIRST_FRAME_SCRIPT = """
+import sys, threading, tkinter as tk
+sys.path.insert(0, {root!r})
+import main, state
+root = tk.Tk()
+def on_map(event):
+    if event.widget is root:
+        print("FIRST_FRAME", flush=True)
+        root.after(0, root.destroy)
+root.bind("<Map>", on_map)
+main.start_gui(main.get_phase, main.get_afk, main.get_time_remaining, main.toggle_pause,
+               main.is_unscheduled, get_overtime=lambda: state.overtime,
+               set_phase=lambda p: setattr(state, "current_phase", p),
+               stop_event=threading.Event(), root=root)
+"""
+
+def import_time(workdir):
+    """Return (total_ms, [(cumulative_ms, module), ...]) for `import main`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=REPO_ROOT),
+        capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative) / 1000, name.strip()))
+    total = next((ms for ms, name in modules if name == "main"), 0.0)
+    return total, sorted((m for m in modules if m[1] != "main"), reverse=True)
+
+def first_frame_time(workdir, timeout=30):
+    """Milliseconds from spawning the app until its window is mapped."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _FIRST_FRAME_SCRIPT.format(root=REPO_ROOT)],
+        cwd=workdir, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        for line in proc.stdout:
+            if line.strip() == "FIRST_FRAME":
+                return (time.perf_counter() - start) * 1000
+        raise RuntimeError("window was never mapped")
+    finally:
+        try:
+            proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def run(runs=3):
+    # gui creates data/ and reads blocked_apps.json from the working directory
+    with tempfile.TemporaryDirectory() as workdir:
+        imports = [import_time(workdir) for _ in range(runs)]
+        frames = [first_frame_time(workdir) for _ in range(runs)]
+    return {
+        "import_main": statistics.median(total for total, _ in imports),
+        "first_frame": statistics.median(frames),
+        "heaviest_imports": imports[-1][1][:10],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    over = {key: results[key] for key, budget in STARTUP_BUDGET_MS.items() if results[key] > budget}
+    if args.json:
+        print(json.dumps(dict(results, budget_ms=STARTUP_BUDGET_MS, over_budget=sorted(over)), indent=2))
+    else:
+        for key, budget in STARTUP_BUDGET_MS.items():
+            flag = "OVER" if key in over else "ok"
+            print(f"{key:12s} {results[key]:8.1f} ms  (budget {budget} ms) {flag}")
+        print("heaviest imports (cumulative):")
+        for ms, name in results["heaviest_imports"]:
+            print(f"  {ms:8.1f} ms  {name}")
+    sys.exit(1 if over else 0)
@@ -0,0 +1,128 @@
+"""
+Synthetic usage logs for benchmarking.
+
+Writes realistic foreground-sampling data: one row per sample interval,
+with app switches, window-title churn inside an app and blocks of work,
+break and unscheduled time. 30 days at 1 Hz is about 2.6M rows.
+
+    python -m benchmarks.generate_log OUT_DIR [--days 30] [--interval 1]
+        [--apps 20] [--title-churn 0.02] [--app-switch 0.01]
+        [--phase-mix 0.6,0.2,0.2] [--v2 | --legacy]
+
+By default OUT_DIR receives one v3 segment per day, like logger writes
+them, with the string table in usage_strings.csv next to OUT_DIR (so
+OUT_DIR=data/usage gives the app's own layout). --v2 writes segments with
+names instead of ids; --legacy writes a single v1 usage_log.csv.
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import datetime
+
+from logformat import FIELDNAMES_V1, FIELDNAMES_V2, FIELDNAMES_V3, day_of, format_ts, wall_seconds
+from strtable import StringTable
+
+PHASES = ("work", "break", "unscheduled")
+
+def generate_records(days=30, interval=1, apps=20, title_churn=0.02, app_switch=0.01,
+                     phase_mix=(0.6, 0.2, 0.2), block_minutes=15, end=None, seed=0):
+    """
+    Yield (ts_start, ts_end, duration_secs, app_name, window_title, phase)
+    records covering `days` days up to `end` (default: now).
+    """
+    rng = random.Random(seed)
+    end = wall_seconds(end or datetime.now())
+    t = end - days * 86400
+    t -= t % interval
+
+    # A few apps get most of the time, like real usage
+    app_names = [f"app{i:02d}.exe" for i in range(apps)]
+    app_weights = [1 / (i + 1) for i in range(apps)]
+    app = rng.choices(app_names, app_weights)[0]
+    title_no = 0
+    phase = PHASES[0]
+    block_end = t
+
+    while t + interval <= end:
+        if t >= block_end:
+            phase = rng.choices(PHASES, phase_mix)[0]
+            block_end = t + block_minutes * 60
+        if rng.random() < app_switch:
+            app = rng.choices(app_names, app_weights)[0]
+            title_no = 0
+        elif rng.random() < title_churn:
+            title_no += 1
+        yield (t, t + interval, interval, app, f"{app[:-4]} - document {title_no}", phase)
+        t += interval
+
+def write_segments(records, out_dir, strings=None):
+    """
+    Write records as per-day v2 segments, or v3 segments with ids from the
+    given StringTable (which is then saved). Returns the number of rows.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    day = f = writer = None
+    try:
+        for record in records:
+            record_day = day_of(record[0])
+            if record_day != day:
+                if f is not None:
+                    f.close()
+                day = record_day
+                f = open(os.path.join(out_dir, day + ".csv"), "w", newline="", encoding="utf-8")
+                writer = csv.writer(f)
+                writer.writerow(FIELDNAMES_V2 if strings is None else FIELDNAMES_V3)
+            if strings is not None:
+                start, end, duration, app, title, phase = record
+                record = (start, end, duration, strings.intern(app), strings.intern(title), phase)
+            writer.writerow(record)
+            count += 1
+    finally:
+        if f is not None:
+            f.close()
+        if strings is not None:
+            strings.save()
+    return count
+
+def write_legacy(records, path):
+    """Write records as one v1 usage_log.csv with string timestamps. Returns the number of rows."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES_V1)
+        for start, end, duration, app, title, phase in records:
+            writer.writerow((format_ts(start), format_ts(end), duration, app, title, phase))
+            count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out", help="segment directory (or file with --legacy)")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=1, help="seconds per row")
+    parser.add_argument("--apps", type=int, default=20)
+    parser.add_argument("--title-churn", type=float, default=0.02, help="chance per row of a new window title")
+    parser.add_argument("--app-switch", type=float, default=0.01, help="chance per row of switching app")
+    parser.add_argument("--phase-mix", default="0.6,0.2,0.2", help="work,break,unscheduled weights")
+    parser.add_argument("--seed", type=int, default=0)
+    formats = parser.add_mutually_exclusive_group()
+    formats.add_argument("--v2", action="store_true", help="write v2 segments with names instead of ids")
+    formats.add_argument("--legacy", action="store_true", help="write a single v1 usage_log.csv")
+    args = parser.parse_args(argv)
+
+    records = generate_records(args.days, args.interval, args.apps, args.title_churn, args.app_switch,
+                               tuple(float(w) for w in args.phase_mix.split(",")), seed=args.seed)
+    if args.legacy:
+        count = write_legacy(records, args.out)
+    elif args.v2:
+        count = write_segments(records, args.out)
+    else:
+        strings_path = os.path.join(os.path.dirname(os.path.abspath(args.out)), "usage_strings.csv")
+        count = write_segments(records, args.out, StringTable(strings_path))
+    print(f"wrote {count} rows to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Repeatable benchmarks for the logging, summary and blocking hot paths.
+
+Generates a synthetic log in a temporary directory, points logger at it and
+times flush_buffer, maybe_compact, summarize_today, summarize_week,
+app_usage_summary and enforce_blocked_apps. Summaries are timed "cold"
+(rollups rebuilt from the raw segments) and "warm" (rollups cached).
+
+    python -m benchmarks.run [--days 30] [--interval 1] [--repeat 5]
+        [--out results.json] [--baseline previous.json]
+
+Results are JSON so runs from different commits can be compared;
+--baseline prints the ratio against an earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import logger
+from strtable import strings
+from benchmarks.bench_blocker import FakePsutil
+from benchmarks.generate_log import generate_records, write_segments
+
+def _measure(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs": repeat,
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _use_log_dir(workdir):
+    logger.LOG_DIR = os.path.join(workdir, "usage")
+    logger.LOG_PATH = os.path.join(workdir, "usage_log.csv")
+    _drop_rollups()
+
+def _drop_rollups(days=None):
+    """Forget cached rollups (all, or just `days`) so the next query rebuilds them."""
+    with logger.rollup_lock:
+        for day in list(days if days is not None else logger._tails):
+            logger._tails.pop(day, None)
+            logger._dirty_days.discard(day)
+            try:
+                os.remove(logger._rollup_path(day))
+            except OSError:
+                pass
+
+def bench_logger(workdir, repeat, flush_rows):
+    results = {}
+    today = datetime.now().date()
+    week_days = [(today - timedelta(days=i)).isoformat() for i in range(today.weekday() + 1)]
+
+    def fill_buffer():
+        now = datetime.now()
+        for i in range(flush_rows):
+            logger.log_event(now - timedelta(seconds=i + 1), now - timedelta(seconds=i), "bench.exe", "bench", "work")
+
+    results["flush_buffer"] = _measure(logger.flush_buffer, repeat, fill_buffer)
+
+    def add_old_segments():
+        for i in range(40, 45):
+            day = (today - timedelta(days=i)).isoformat()
+            shutil.copyfile(os.path.join(logger.LOG_DIR, today.isoformat() + ".csv"),
+                            os.path.join(logger.LOG_DIR, day + ".csv"))
+        logger._last_compact_ts = 0
+
+    results["maybe_compact"] = _measure(logger.maybe_compact, repeat, add_old_segments)
+
+    for name, fn, days in (
+        ("summarize_today", logger.summarize_today, [today.isoformat()]),
+        ("summarize_week", logger.summarize_week, week_days),
+        ("app_usage_summary_weekly", lambda: logger.app_usage_summary("weekly"), week_days),
+    ):
+        results[name + "_cold"] = _measure(fn, repeat, lambda days=days: _drop_rollups(days))
+        fn()
+        results[name + "_warm"] = _measure(fn, repeat)
+    return results
+
+def bench_blocker(repeat, n_procs=1000, churn=5):
+    fake = FakePsutil(n_procs)
+    sys.modules.setdefault("psutil", fake)
+    import main
+    import process_watcher
+    import state
+    main.psutil = process_watcher.psutil = fake
+
+    state.current_phase = "work"
+    state.blocked_apps = ["discord.exe", "steam.exe"]
+    state.show_warnings = False
+    main.enforce_blocked_apps(None)  # first scan fills the pid cache
+
+    def one_scan():
+        fake.churn(churn)
+        main.enforce_blocked_apps(None)
+
+    return {"enforce_blocked_apps": _measure(one_scan, max(repeat, 50))}
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old:
+            ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            print(f"{name:32s} {old['median_ms']:10.2f} -> {stats['median_ms']:10.2f} ms  ({ratio:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=1, help="seconds per generated row")
+    parser.add_argument("--apps", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--flush-rows", type=int, default=30, help="rows per flush_buffer call")
+    parser.add_argument("--out", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="usage-bench-")
+    try:
+        start = time.perf_counter()
+        strings.reset(os.path.join(workdir, "usage_strings.csv"))
+        rows = write_segments(generate_records(args.days, args.interval, args.apps),
+                              os.path.join(workdir, "usage"), strings)
+        generate_secs = time.perf_counter() - start
+        _use_log_dir(workdir)
+
+        results = bench_logger(workdir, args.repeat, args.flush_rows)
+        results.update(bench_blocker(args.repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "commit": _git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": dict(vars(args), rows=rows, generate_secs=generate_secs),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,42 @@
 WORK_DURATION = 52 * 60 # seconds
 BREAK_DURATION = 17 * 60 # seconds
 AFK_TIMEOUT = 60
-LOG_PATH = "data/usage_log.csv"
\ No newline at end of file
+# Legacy single-file log; split into LOG_DIR segments on first start
+LOG_PATH = "data/usage_log.csv"
+# One CSV segment (plus its rollup) per day: data/usage/YYYY-mm-dd.csv
+LOG_DIR = "data/usage"
+# id <-> string table for the app names and window titles in the segments
+STRINGS_PATH = "data/usage_strings.csv"
+# Usage log storage: "csv" (default) or "sqlite"
+LOG_BACKEND = "csv"
+DB_PATH = "data/usage_log.db"
+# Retention tiers (see logger.maybe_compact): raw intervals for
+# RAW_RETENTION_DAYS, then hour x app x phase rollups until
+# HOURLY_RETENTION_DAYS, then per-day totals forever
+RAW_RETENTION_DAYS = 30
+HOURLY_RETENTION_DAYS = 365
+# Hot-path metrics (see metrics.py); off by default so instrumented code runs untouched
+METRICS_ENABLED = False
+METRICS_PATH = "data/metrics.jsonl"
+METRICS_DUMP_INTERVAL = 60  # seconds
+METRICS_HTTP_PORT = None  # e.g. 8765 to serve http://127.0.0.1:8765/metrics
+# Tk event-loop watchdog (see watchdog.py): stacks of all threads are dumped
+# to DIAGNOSTICS_DIR whenever a scheduled GUI callback runs this late
+WATCHDOG_ENABLED = True
+WATCHDOG_LAG_MS = 2000
+DIAGNOSTICS_DIR = "data/diagnostics"
+# Usage log writer thread (see logger.LogWriter). Durability per batch:
+# "none", "fsync" (fsync each batch) or "journal" (every row is fsynced to
+# JOURNAL_PATH as it arrives and replayed on the next start after a crash)
+LOG_DURABILITY = "journal"
+JOURNAL_PATH = "data/usage_journal.csv"
+WRITER_QUEUE_ROWS = 10000  # rows beyond this are dropped rather than blocking the tracker
+WRITER_BATCH_ROWS = 500
+WRITER_FLUSH_SECS = 30
+# Rollups with at least this many unread bytes in total are caught up by a
+# pool of SCAN_WORKERS processes (None: one per CPU) instead of serially
+PARALLEL_SCAN_BYTES = 32 * 1024 * 1024
+SCAN_WORKERS = None
+# Periods of the scheduler jobs (seconds)
+TRACK_INTERVAL = 1
+BLOCK_INTERVAL = 1
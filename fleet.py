@@ -0,0 +1,287 @@
+# fleet.py
+"""
+Usage across many workstations, from copies of each machine's log.
+
+Every input is HOST=PATH, where PATH is a machine's data directory (its
+usage/ segments and retention tiers, usage_strings.csv and any not yet
+migrated usage_log.csv), a usage/ directory, or a single log file of any
+version.
+
+    python fleet.py merge OUT.csv alice=//alice/timer/data bob=bob-data ...
+    python fleet.py rollup [--from D] [--to D] [--top N] [--jobs N] alice=... bob=...
+
+merge streams every host's rows into one CSV in ts_start order. Its columns
+are FIELDNAMES_V2 (names, since ids are per machine) plus the host, so the
+result is itself a v2 log. Days past RAW_RETENTION_DAYS have no rows left
+and are not part of it. Each input holds one daily segment in memory and at
+most MERGE_FAN_IN inputs are merged at once; larger fleets are merged
+through temporary files, so memory does not grow with the number of hosts.
+
+rollup folds each host in its own process with the logger's rollup code,
+reading the hourly and per-day tiers the way logger.query() does, and sums
+the per-day results as they come back. Window titles stay out of the fleet
+totals.
+"""
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from functools import partial
+from operator import itemgetter
+import logger
+from logformat import FIELDNAMES_V2, day_of, format_version, parse_row, read_records
+from strtable import StringTable, strings
+
+MERGED_FIELDNAMES = FIELDNAMES_V2 + ["host"]
+# Inputs open at once in one merge pass
+MERGE_FAN_IN = 64
+
+def parse_host(arg):
+    """"HOST=PATH" -> (host, path)."""
+    host, sep, path = arg.partition("=")
+    if not sep or not host or not path:
+        raise argparse.ArgumentTypeError(f"expected HOST=PATH, got {arg!r}")
+    return host, path
+
+def host_files(path):
+    """
+    (log files of one machine in time order, its string table path, its
+    segment directory or None for a lone file).
+    Raises ValueError if PATH holds no usage log at all.
+    """
+    if os.path.isfile(path):
+        # A lone segment's string table sits next to its usage/ directory
+        strings_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(path))), "usage_strings.csv")
+        return [path], strings_path, None
+    files = []
+    segment_dir = path
+    strings_path = os.path.join(os.path.dirname(os.path.abspath(path)), "usage_strings.csv")
+    # A data directory: an unmigrated usage_log.csv, usage/ segments, or both
+    if os.path.exists(os.path.join(path, "usage_log.csv")):
+        files.append(os.path.join(path, "usage_log.csv"))
+        strings_path = os.path.join(path, "usage_strings.csv")
+    if os.path.isdir(os.path.join(path, "usage")):
+        segment_dir = os.path.join(path, "usage")
+        strings_path = os.path.join(path, "usage_strings.csv")
+    names = sorted(os.listdir(segment_dir))
+    files += [os.path.join(segment_dir, name) for name in names if _segment_day(name) is not None]
+    if not files and not any(name.endswith((".rollup.json", ".daily.json")) for name in names):
+        raise ValueError(f"no usage logs found in {path}")
+    return files, strings_path, segment_dir
+
+def _segment_day(path):
+    """"YYYY-mm-dd" of a daily segment, or None for a file spanning many days."""
+    name = os.path.basename(path)
+    try:
+        return date.fromisoformat(name[:-4]).isoformat() if name.endswith(".csv") else None
+    except ValueError:
+        return None
+
+def _in_range(day, start, end):
+    return (start is None or day >= start) and (end is None or day <= end)
+
+def _stored_days(segment_dir):
+    """Days with data in a segment directory, in any tier. Call with logger pointed at it."""
+    days = set()
+    for name in os.listdir(segment_dir):
+        if name.endswith(".rollup.json"):
+            days.add(name[:10])
+        elif name.endswith(".daily.json"):
+            days.update(logger._archive(name[:4]) or ())
+        elif _segment_day(name) is not None:
+            days.add(_segment_day(name))
+    return days
+
+def _host_rows(host, path):
+    """
+    One machine's rows with names in ts_start order, tagged with the host:
+    FIELDNAMES_V2 values + (host,). Journal replay can append older rows to
+    a day's segment, so segments are sorted as they are read; a file of many
+    days is too big for that and must already be in order (ValueError if not).
+    """
+    files, strings_path, _ = host_files(path)
+    table = StringTable(strings_path)
+    last = None
+    for file_path in files:
+        records = read_records(file_path, table=table)
+        if _segment_day(file_path) is not None:
+            records = sorted(records, key=itemgetter(0))
+        for record in records:
+            if last is not None and record[0] < last:
+                raise ValueError(f"{file_path}: rows are not in ts_start order")
+            last = record[0]
+            yield record + (host,)
+
+def _merged_rows(path):
+    """Rows of an earlier merge pass."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for values in reader:
+            record = parse_row(values, 2)
+            if record is not None and len(values) > len(FIELDNAMES_V2):
+                yield record + (values[len(FIELDNAMES_V2)],)
+
+def _write_merged(sources, out_path):
+    """Merge the sources' rows by ts_start into out_path. Returns the row count."""
+    count = 0
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(MERGED_FIELDNAMES)
+        for row in heapq.merge(*(open_rows() for open_rows in sources), key=itemgetter(0)):
+            writer.writerow(row)
+            count += 1
+    return count
+
+def merge(hosts, out_path, fan_in=MERGE_FAN_IN):
+    """
+    Write the rows of every (host, path) to out_path in ts_start order.
+    Each machine's rows come out of _host_rows() in time order, so this is
+    a k-way merge. Returns the number of rows written.
+    """
+    sources = [partial(_host_rows, host, path) for host, path in hosts]
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp_dir:
+        level = 0
+        while len(sources) > fan_in:
+            # Too many to hold open: merge groups into runs, then the runs
+            runs = []
+            for i in range(0, len(sources), fan_in):
+                run_path = os.path.join(tmp_dir, f"{level}-{len(runs)}.csv")
+                _write_merged(sources[i:i + fan_in], run_path)
+                runs.append(partial(_merged_rows, run_path))
+            sources = runs
+            level += 1
+        return _write_merged(sources, out_path)
+
+def host_rollup(path, start=None, end=None):
+    """
+    {day: rollup} for one machine, keyed by names and without titles.
+    Runs in a worker process: the string table and logger.LOG_DIR are
+    pointed at the host's, so every tier is read by logger._get_day().
+    """
+    files, strings_path, segment_dir = host_files(path)
+    strings.reset(strings_path)
+    days = {}
+    for file_path in files:
+        if _segment_day(file_path) is None:
+            # e.g. an unmigrated usage_log.csv: rows of many days
+            for record in read_records(file_path, ids=True):
+                day = day_of(record[0])
+                if _in_range(day, start, end):
+                    logger._add_to_rollup(days.setdefault(day, logger._new_day()), record)
+        elif segment_dir is None and _in_range(_segment_day(file_path), start, end):
+            with open(file_path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                version = format_version(next(reader, None))
+                rows = list(reader)
+            logger._fold_rows(days.setdefault(_segment_day(file_path), logger._new_day()), rows, version)
+
+    if segment_dir is not None:
+        log_dir = logger.LOG_DIR
+        with logger.rollup_lock:
+            logger.LOG_DIR = segment_dir
+            try:
+                for day in sorted(_stored_days(segment_dir)):
+                    rollup = logger._get_day(day) if _in_range(day, start, end) else None
+                    if rollup is not None:
+                        logger._merge_rollup(days.setdefault(day, logger._new_day()), rollup)
+            finally:
+                # Nothing of the host's is ever saved or kept for the next task
+                logger.LOG_DIR = log_dir
+                logger._tails.clear()
+                logger._archives.clear()
+                logger._dirty_days.clear()
+
+    lookup = strings.lookup
+    return {day: {
+        "phases": rollup["phases"],
+        "apps": {lookup(app): secs for app, secs in rollup["apps"].items()},
+        "hours": [{lookup(app): phases for app, phases in hour.items()} for hour in rollup["hours"]],
+    } for day, rollup in days.items()}
+
+def fleet_rollups(hosts, start=None, end=None, jobs=None):
+    """
+    Combined {day: rollup} over every (host, path), plus each host's phase
+    totals. Hosts are folded in parallel by up to `jobs` processes.
+    """
+    start = start.isoformat() if start else None
+    end = end.isoformat() if end else None
+    days = {}
+    per_host = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(host_rollup, path, start, end): host for host, path in hosts}
+        for future in as_completed(futures):
+            host_days = future.result()
+            phases = per_host.setdefault(futures.pop(future), {"work": 0, "break": 0, "unscheduled": 0})
+            for day, rollup in host_days.items():
+                logger._merge_rollup(days.setdefault(day, {"phases": {}, "apps": {}, "hours": [{} for _ in range(24)]}),
+                                     rollup)
+                for phase in phases:
+                    phases[phase] += rollup["phases"].get(phase, 0)
+    return days, per_host
+
+def summarize(days, per_host, top_n=None):
+    """The logger.query() aggregates over combined rollups, plus per-host phase totals."""
+    phase_totals = {"work": 0, "break": 0, "unscheduled": 0}
+    apps = Counter()
+    hourly = defaultdict(lambda: defaultdict(int))
+    daily = {}
+    for day, rollup in sorted(days.items()):
+        daily[day] = {phase: rollup["phases"].get(phase, 0) for phase in phase_totals}
+        for phase in phase_totals:
+            phase_totals[phase] += daily[day][phase]
+        apps.update(rollup["apps"])
+        for hour, hour_apps in enumerate(rollup["hours"]):
+            for app, phases in hour_apps.items():
+                hourly[hour][app] += sum(phases.values())
+    return {
+        "phases": phase_totals,
+        "cycles": logger.cycles_for(phase_totals["work"]),
+        "top_apps": apps.most_common(top_n),
+        "hourly": hourly,
+        "daily": daily,
+        "hosts": {host: dict(phases, cycles=logger.cycles_for(phases["work"]))
+                  for host, phases in sorted(per_host.items())},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge and summarize usage logs from many machines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge_cmd = commands.add_parser("merge", help="one CSV of every host's rows in time order")
+    merge_cmd.add_argument("out", help="output CSV")
+    merge_cmd.add_argument("hosts", nargs="+", type=parse_host, metavar="HOST=PATH")
+    rollup_cmd = commands.add_parser("rollup", help="combined totals as JSON")
+    rollup_cmd.add_argument("--from", dest="start", type=date.fromisoformat, help="first day, YYYY-mm-dd")
+    rollup_cmd.add_argument("--to", dest="end", type=date.fromisoformat, help="last day, YYYY-mm-dd")
+    rollup_cmd.add_argument("--top", type=int, help="only the top N apps")
+    rollup_cmd.add_argument("--jobs", type=int, help="worker processes (default: one per CPU)")
+    rollup_cmd.add_argument("hosts", nargs="+", type=parse_host, metavar="HOST=PATH")
+    args = parser.parse_args(argv)
+
+    if len({host for host, _ in args.hosts}) != len(args.hosts):
+        parser.error("host ids must be unique")
+    for host, path in args.hosts:
+        try:
+            host_files(path)
+        except (OSError, ValueError) as e:
+            parser.error(f"host {host}: {e}")
+    if args.command == "merge":
+        try:
+            count = merge(args.hosts, args.out)
+        except ValueError as e:
+            parser.error(f"can't merge: {e}")
+        print(f"Merged {count} rows from {len(args.hosts)} hosts into {args.out}", file=sys.stderr)
+    else:
+        days, per_host = fleet_rollups(args.hosts, args.start, args.end, args.jobs)
+        json.dump(summarize(days, per_host, args.top), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,134 +1,186 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import tkinter.font as tkfont
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from logger import summarize_today, summarize_week, app_usage_summary
+import math
+from summary_worker import SummaryWorker
+from watchdog import LoopWatchdog
 from config import BREAK_DURATION, WORK_DURATION
-from timer import start_phase_timer, tick, get_time_remaining
+from timer import start_phase_timer, sync, get_time_remaining
 import threading
 import psutil
 import state
 import os
 import json
+import queue
+import metrics
+
+# Longest the timer goes without a wakeup when no deadline is due (seconds)
+MAX_TICK_WAIT = 60
 
 if not os.path.exists("data"):
     os.makedirs("data")
 
-# Apply a dark theme for matplotlib consistent with Hatsune Miku colors
-plt.style.use('dark_background')
-plt.rcParams['text.color'] = '#E6FBFF'
-plt.rcParams['axes.facecolor'] = '#071025'
-plt.rcParams['figure.facecolor'] = '#071025'
-plt.rcParams['savefig.facecolor'] = '#071025'
-
-# Globals to track current charts
-current_pie_fig = None
-current_pie_canvas = None
-current_bar_fig = None
-current_bar_canvas = None
-
-def update_pie_chart(app_usage, frame, width=4, height=4):
-    global current_pie_fig, current_pie_canvas
-
-    # Destroy previous pie chart if it exists
-    if current_pie_canvas is not None:
-        try:
-            current_pie_canvas.get_tk_widget().destroy()
-        except tk.TclError:
-            pass
-        current_pie_canvas = None
-
-    if current_pie_fig is not None:
-        try:
-            plt.close(current_pie_fig)
-        except Exception:
-            pass
-        current_pie_fig = None
-
-    if not app_usage:  # nothing to show
-        return None
-
-    # Extract cycles separately so it doesn't become a slice
-    cycles = app_usage.pop("cycles", 0)
-
-    # Create new pie chart
-    current_pie_fig, ax = plt.subplots(figsize=(width, height))
-    labels = list(app_usage.keys())
-    sizes = list(app_usage.values())
-
-    if sum(sizes) > 0:
-        # Draw donut-style pie chart
-        wedges, texts, autotexts = ax.pie(
-            sizes,
-            labels=labels,
-            autopct='%1.1f%%',
-            startangle=90,
-            wedgeprops=dict(width=0.4)  # makes a hole in the middle
+# matplotlib is only imported when the first chart is drawn, so the timer
+# window can appear before the chart backends are loaded.
+Figure = FigureCanvasTkAgg = Circle = None
+
+def _load_matplotlib():
+    global Figure, FigureCanvasTkAgg, Circle
+    if Figure is not None:
+        return
+    import matplotlib
+    from matplotlib import style
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_cls
+    from matplotlib.figure import Figure as figure_cls
+    from matplotlib.patches import Circle as circle_cls
+
+    # Apply a dark theme for matplotlib consistent with Hatsune Miku colors
+    style.use('dark_background')
+    matplotlib.rcParams['text.color'] = '#E6FBFF'
+    matplotlib.rcParams['axes.facecolor'] = '#071025'
+    matplotlib.rcParams['figure.facecolor'] = '#071025'
+    matplotlib.rcParams['savefig.facecolor'] = '#071025'
+
+    Figure, FigureCanvasTkAgg, Circle = figure_cls, canvas_cls, circle_cls
+
+class DashboardCharts:
+    """
+    The pie and hourly bar charts of the dashboard.
+
+    Figures, canvases and artists are created once and kept between
+    refreshes; a refresh only updates wedge angles and bar heights and asks
+    for draw_idle(). The axes are rebuilt only when the set of slices or
+    apps shown changes.
+    """
+
+    def __init__(self, frame, pie_size=(4, 4), bar_size=(6, 3)):
+        self.frame = frame
+        self.pie_size = pie_size
+        self.bar_size = bar_size
+        self.pie_fig = self.pie_ax = self.pie_canvas = None
+        self.bar_fig = self.bar_ax = self.bar_canvas = None
+        self._pie_key = None
+        self._wedges = self._texts = self._autotexts = None
+        self._center_text = None
+        self._bar_apps = None
+        self._bar_containers = []
+
+    def _make_canvas(self, size):
+        _load_matplotlib()
+        fig = Figure(figsize=size)
+        ax = fig.add_subplot()
+        canvas = FigureCanvasTkAgg(fig, master=self.frame)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        return fig, ax, canvas
+
+    def update(self, stats, top_apps, hourly_usage):
+        self.update_pie(dict(stats))  # update_pie pops cycles, so pass a copy
+        self.update_bars(hourly_usage, top_apps)
+
+    def update_pie(self, app_usage):
+        # Extract cycles separately so it doesn't become a slice
+        cycles = app_usage.pop("cycles", 0)
+        labels = list(app_usage.keys())
+        sizes = list(app_usage.values())
+        total = sum(sizes)
+
+        if self.pie_canvas is None:
+            self.pie_fig, self.pie_ax, self.pie_canvas = self._make_canvas(self.pie_size)
+
+        key = (tuple(labels), total > 0)
+        if key != self._pie_key:
+            self._draw_pie(labels, sizes, total)
+            self._pie_key = key
+        elif total > 0:
+            # Same slices: move the existing wedges and their labels
+            theta1 = 90
+            for wedge, text, autotext, size in zip(self._wedges, self._texts, self._autotexts, sizes):
+                frac = size / total
+                theta2 = theta1 + 360 * frac
+                mid = math.radians((theta1 + theta2) / 2)
+                wedge.set_theta1(theta1)
+                wedge.set_theta2(theta2)
+                x, y = math.cos(mid), math.sin(mid)
+                text.set_position((1.1 * x, 1.1 * y))
+                text.set_horizontalalignment('left' if x > 0 else 'right')
+                autotext.set_position((0.6 * x, 0.6 * y))
+                autotext.set_text(f"{100 * frac:.1f}%")
+                theta1 = theta2
+
+        self._center_text.set_text(f"{cycles:.1f} cycles")
+        self.pie_canvas.draw_idle()
+
+    def _draw_pie(self, labels, sizes, total):
+        ax = self.pie_ax
+        ax.clear()
+        if total > 0:
+            # Draw donut-style pie chart
+            self._wedges, self._texts, self._autotexts = ax.pie(
+                sizes,
+                labels=labels,
+                autopct='%1.1f%%',
+                startangle=90,
+                wedgeprops=dict(width=0.4)  # makes a hole in the middle
+            )
+        else:
+            # Draw an empty circle instead of crashing
+            circle = Circle((0, 0), 0.7, color='lightgray', fill=False, linewidth=2)
+            ax.add_artist(circle)
+
+        # Place cycles in the center
+        self._center_text = ax.text(
+            0, 0, "",
+            ha='center', va='center',
+            fontsize=12, fontweight='bold'
         )
-    else:
-        # Draw an empty circle instead of crashing
-        circle = plt.Circle((0, 0), 0.7, color='lightgray', fill=False, linewidth=2)
-        ax.add_artist(circle)
-
-    # Place cycles in the center
-    ax.text(
-        0, 0, f"{cycles:.1f} cycles",
-        ha='center', va='center',
-        fontsize=12, fontweight='bold'
-    )
-
-    ax.set_title("App Usage Share")
-
-    current_pie_canvas = FigureCanvasTkAgg(current_pie_fig, master=frame)
-    current_pie_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-    current_pie_canvas.draw()
 
-    return current_pie_canvas
-
-def plot_hourly_usage(hourly_usage, top_apps, frame, width=6, height=3):
-    global current_bar_fig, current_bar_canvas
-
-    # Destroy previous bar chart if it exists
-    if current_bar_canvas is not None:
-        try:
-            current_bar_canvas.get_tk_widget().destroy()
-        except tk.TclError:
-            pass
-        current_bar_canvas = None
-
-    if current_bar_fig is not None:
-        try:
-            plt.close(current_bar_fig)
-        except Exception:
-            pass
-        current_bar_fig = None
-
-    hours = list(range(24))
-    app_names = [app for app, _ in top_apps]
-    data = {app: [hourly_usage[h].get(app, 0)/60 for h in hours] for app in app_names}
-
-    current_bar_fig, ax = plt.subplots(figsize=(width, height))
-    bottom = [0]*24
-    for app in app_names:
-        ax.bar(hours, data[app], bottom=bottom, label=app)
-        bottom = [bottom[i]+data[app][i] for i in range(24)]
-
-    ax.set_xticks(hours)
-    ax.set_xlabel("Hour of Day")
-    ax.set_ylabel("Minutes Used")
-    ax.set_title("App Usage by Hour")
-    ax.legend()
-    ax.grid(True, axis='y', linestyle='--', alpha=0.5)
-
-    current_bar_canvas = FigureCanvasTkAgg(current_bar_fig, master=frame)
-    current_bar_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-    current_bar_canvas.draw()
-
-    # Immediately close to avoid memory leak
-    plt.close(current_bar_fig)
-
-    return current_bar_canvas
+        ax.set_title("App Usage Share")
+
+    def update_bars(self, hourly_usage, top_apps):
+        hours = list(range(24))
+        app_names = [app for app, _ in top_apps]
+        data = {app: [hourly_usage[h].get(app, 0)/60 for h in hours] for app in app_names}
+
+        if self.bar_canvas is None:
+            self.bar_fig, self.bar_ax, self.bar_canvas = self._make_canvas(self.bar_size)
+
+        ax = self.bar_ax
+        if app_names != self._bar_apps:
+            # Different apps: new bars and legend
+            ax.clear()
+            self._bar_containers = []
+            bottom = [0]*24
+            for app in app_names:
+                self._bar_containers.append(ax.bar(hours, data[app], bottom=bottom, label=app))
+                bottom = [bottom[i]+data[app][i] for i in range(24)]
+
+            ax.set_xticks(hours)
+            ax.set_xlabel("Hour of Day")
+            ax.set_ylabel("Minutes Used")
+            ax.set_title("App Usage by Hour")
+            ax.legend()
+            ax.grid(True, axis='y', linestyle='--', alpha=0.5)
+            self._bar_apps = app_names
+        else:
+            bottom = [0]*24
+            for app, container in zip(app_names, self._bar_containers):
+                for rect, height, base in zip(container.patches, data[app], bottom):
+                    rect.set_height(height)
+                    rect.set_y(base)
+                bottom = [bottom[i]+data[app][i] for i in range(24)]
+            ax.relim()
+            ax.autoscale_view()
+
+        self.bar_canvas.draw_idle()
+
+    def destroy(self):
+        for canvas in (self.pie_canvas, self.bar_canvas):
+            if canvas is not None:
+                try:
+                    canvas.get_tk_widget().destroy()
+                except tk.TclError:
+                    pass
+        self.pie_canvas = self.bar_canvas = None
 
 def show_kill_warning(root, pname):
     win = tk.Toplevel(root)
@@ -156,7 +208,38 @@ def show_kill_warning(root, pname):
     win.transient(root)
     win.grab_set()
 
-def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unscheduled, get_overtime, set_phase, stop_event=None, root=None):
+def run_with_status(root, work, get_status, title="Pomodoro Tracker"):
+    """
+    Run work() on a worker thread while the window stays responsive. If it
+    takes more than a moment (e.g. the first start after an upgrade migrates
+    the usage log) the window shows get_status() until it is done. Closing
+    the window is ignored meanwhile. Re-raises any error from work().
+    """
+    errors = []
+
+    def run():
+        try:
+            work()
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, name="startup", daemon=True)
+    thread.start()
+    thread.join(0.3)
+    if thread.is_alive():
+        root.title(title)
+        root.protocol("WM_DELETE_WINDOW", lambda: None)
+        msg = tk.Label(root, text=get_status(), width=48, padx=20, pady=30)
+        msg.pack()
+        while thread.is_alive():
+            msg.config(text=get_status())
+            root.update()
+            thread.join(0.05)
+        msg.destroy()
+    if errors:
+        raise errors[0]
+
+def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unscheduled, get_overtime, set_phase, stop_event=None, root=None, get_idle=None):
     if root is None:
         root = tk.Tk()
     root.title("Pomodoro Tracker")
@@ -254,7 +337,11 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
     stats_label = ttk.Label(bottom_card, textvariable=stats_var, style="Stats.TLabel", justify="left")
     stats_label.grid(row=0, column=0, sticky="w")
 
-    btn_pause = ttk.Button(bottom_card, text="Pause", command=toggle_pause, style="Accent.TButton")
+    def on_pause():
+        toggle_pause()
+        schedule_tick(0)  # the next deadline changed
+
+    btn_pause = ttk.Button(bottom_card, text="Pause", command=on_pause, style="Accent.TButton")
     btn_pause.grid(row=0, column=1, sticky="e", padx=6)
 
     pie_update_counter = 0
@@ -289,16 +376,30 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
 
     chk_auto.grid(row=1, column=0, columnspan=3, sticky="w", pady=(8,0))
 
-    after_ids = []
+    # Reports (with stack dumps) when these callbacks fire late, i.e. Tk is stuck
+    watchdog = LoopWatchdog(root).start()
+    tick_id = None
+
+    def schedule_tick(ms):
+        nonlocal tick_id
+        if tick_id is not None:
+            watchdog.cancel("gui_tick", tick_id)
+        tick_id = watchdog.after(ms, "gui_tick", gui_tick)
 
     def gui_tick():
-        tick(is_afk=get_afk)
+        nonlocal tick_id
+        tick_id = None
+        wait = sync(get_idle() if get_idle else None)
 
         # Check for auto-phase
         if state.auto_phase and get_time_remaining() <= 0:
             next_phase()
+            wait = sync(get_idle() if get_idle else None)
 
-        after_ids.append(root.after(1000, gui_tick))
+        # One wakeup at the next deadline; the cap picks up settings changes
+        if wait is None or wait > MAX_TICK_WAIT:
+            wait = MAX_TICK_WAIT
+        schedule_tick(max(50, int(wait * 1000) + 5))
 
     def next_phase():
         global time_elapsed, phase_duration
@@ -319,6 +420,7 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
         time_elapsed = 0
         start_phase_timer(phase_duration)
         state.notified = False
+        schedule_tick(0)
 
     ttk.Button(bottom_card, text="Next Phase", command=next_phase, style="Accent.TButton").grid(row=0, column=2)
 
@@ -347,6 +449,7 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
             start_phase_timer(state.WORK_DURATION)
         elif state.current_phase == "break":
             start_phase_timer(state.BREAK_DURATION)
+        schedule_tick(0)
 
     ttk.Button(duration_card, text="Apply", command=apply_durations, style="Accent.TButton").grid(row=2, column=0, columnspan=2, pady=5)
 
@@ -462,19 +565,63 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
     current_app_canvas = None
 
     def on_view_change():
-        # Reset counter so the chart updates immediately
+        # Refresh now and restart the 60 s refresh cycle
         nonlocal pie_update_counter
-        pie_update_counter = 0
-        update_gui()  # force immediate GUI update
+        pie_update_counter = 1
+        request_summary()
 
     ttk.Radiobutton(toggle_frame, text="Daily", variable=view_var, value="daily", style="TRadiobutton", command=on_view_change).pack(side=tk.LEFT, padx=8)
     ttk.Radiobutton(toggle_frame, text="Weekly", variable=view_var, value="weekly", style="TRadiobutton", command=on_view_change).pack(side=tk.LEFT, padx=8)
 
-    current_pie_canvas = None
+    charts = DashboardCharts(chart_card)
+
+    # Summaries are computed on a worker thread so a big log never blocks Tk
+    summary_worker = SummaryWorker().start()
+    poll_id = None
+
+    def request_summary():
+        nonlocal poll_id
+        summary_worker.request(view_var.get())
+        if poll_id is None:
+            poll_id = root.after(50, poll_summary)
+
+    def poll_summary():
+        nonlocal poll_id
+        poll_id = None
+        latest = None
+        try:
+            while True:
+                latest = summary_worker.results.get_nowait()
+        except queue.Empty:
+            pass
+
+        if latest is None or latest[0] != view_var.get():
+            # Nothing yet, or computed for a view that is no longer shown
+            poll_id = root.after(50, poll_summary)
+            return
+        period, result = latest
+        if result is None:
+            return
+
+        stats, top_apps, hourly_usage = result
+        try:
+            if charts.pie_canvas is None:
+                # First chart: paint the rest of the window before loading matplotlib
+                root.update_idletasks()
+            charts.update(stats, top_apps, hourly_usage)
+            stats_var.set(
+                f"{period.capitalize()} Summary:\n"
+                f"Work: {stats['work'] // 60} min\n"
+                f"Break: {stats['break'] // 60} min\n"
+                f"Unscheduled: {stats['unscheduled'] // 60} min\n"
+                f"Cycles: {stats['cycles']:.1f}"
+            )
+        except tk.TclError:
+            pass
 
+    @metrics.timed("gui.update_gui")
     def update_gui():
         nonlocal pie_update_counter, after_id
-        global current_pie_canvas, current_bar_canvas
         overtime = get_overtime()
         phase = get_phase()
         paused = is_unscheduled()
@@ -490,56 +637,30 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
             return
 
         if pie_update_counter % 60 == 0:
-            if view_var.get() == "daily":
-                stats = summarize_today()
-                top_apps, hourly_usage = app_usage_summary("daily")
-            else:
-                stats = summarize_week()
-                top_apps, hourly_usage = app_usage_summary("weekly")
-
-            current_pie_canvas = update_pie_chart(dict(stats), chart_card)  # if update_pie_chart mutates, pass a copy
-            stats_var.set(
-                f"{view_var.get().capitalize()} Summary:\n"
-                f"Work: {stats['work'] // 60} min\n"
-                f"Break: {stats['break'] // 60} min\n"
-                f"Unscheduled: {stats['unscheduled'] // 60} min\n"
-                f"Cycles: {stats['cycles']:.1f}"
-            )
-            current_bar_canvas = plot_hourly_usage(hourly_usage, top_apps, chart_card)
+            request_summary()
 
         pie_update_counter += 1
-        after_id = root.after(1000, update_gui)
+        after_id = watchdog.after(1000, "update_gui", update_gui)
 
     def on_close():
         if stop_event:
             stop_event.set()
+        watchdog.stop()
 
         # Cancel any scheduled after calls
         try:
             if after_id:
                 root.after_cancel(after_id)
+            if tick_id:
+                root.after_cancel(tick_id)
+            if poll_id:
+                root.after_cancel(poll_id)
         except tk.TclError:
             pass
+        summary_worker.stop()
 
-        # Destroy pie chart safely
-        if current_pie_canvas is not None:
-            try:
-                current_pie_canvas.get_tk_widget().destroy()
-            except tk.TclError:
-                pass
-
-        # Destroy app usage bar graph safely
-        if current_bar_canvas is not None:
-            try:
-                current_bar_canvas.get_tk_widget().destroy()
-            except tk.TclError:
-                pass
-
-        # Close matplotlib figures
-        try:
-            plt.close("all")
-        except Exception:
-            pass
+        # Destroy the chart widgets safely
+        charts.destroy()
 
         # Destroy the Tk root window
         try:
@@ -551,12 +672,5 @@ def start_gui(get_phase, get_afk, get_time_remaining, toggle_pause, is_unschedul
 
     gui_tick()
     update_gui()
-    
-    def check_stop():
-        if stop_event and stop_event.is_set():
-            on_close()
-        else:
-            root.after(100, check_stop)  # check every 100ms
-
-    root.after(100, check_stop)
+    # Closing the window is what stops the app: on_close sets stop_event
     root.mainloop()
\ No newline at end of file
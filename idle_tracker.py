@@ -1,12 +1,14 @@
 import ctypes
 import time
 
-def get_idle_duration():
-    class LASTINPUTINFO(ctypes.Structure):
-        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+# Defined once; the sensor hub asks for the idle time every period
+class LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
 
+def get_idle_duration():
     lii = LASTINPUTINFO()
     lii.cbSize = ctypes.sizeof(LASTINPUTINFO)
     ctypes.windll.user32.GetLastInputInfo(ctypes.byref(lii))
-    millis = ctypes.windll.kernel32.GetTickCount() - lii.dwTime
-    return millis / 1000.0  # seconds
\ No newline at end of file
+    # Both are 32-bit millisecond tick counts that wrap every ~49.7 days
+    millis = (ctypes.windll.kernel32.GetTickCount() - lii.dwTime) & 0xFFFFFFFF
+    return millis / 1000.0  # seconds
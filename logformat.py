@@ -0,0 +1,173 @@
+# logformat.py
+"""
+Row formats of the usage log.
+
+v1 (legacy) stores "YYYY-mm-dd HH:MM:SS" strings. v2 stores integer
+wall-clock epoch seconds: the local time read as if it were UTC, so day and
+hour bucketing is plain integer arithmetic and matches the old strings
+exactly. v3 keeps the v2 timestamps but stores the app name and window
+title as ids into the string table (see strtable). Readers accept all
+three; the header row tells them apart.
+"""
+import csv
+import threading
+from array import array
+from datetime import date, datetime, timedelta
+from strtable import strings
+
+FIELDNAMES_V1 = ["timestamp_start", "timestamp_end", "duration_secs", "app_name", "window_title", "phase"]
+FIELDNAMES_V2 = ["ts_start", "ts_end", "duration_secs", "app_name", "window_title", "phase"]
+FIELDNAMES_V3 = ["ts_start", "ts_end", "duration_secs", "app_id", "title_id", "phase"]
+# Format written by the logger
+FIELDNAMES = FIELDNAMES_V3
+FORMAT_VERSION = 3
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_ONE_SECOND = timedelta(seconds=1)
+_day_names = {}
+
+def wall_seconds(dt):
+    """Naive local datetime -> wall-clock epoch seconds (sub-seconds dropped, like strftime)."""
+    return (dt - _EPOCH) // _ONE_SECOND
+
+def day_start(d):
+    """Wall-clock epoch seconds of midnight on date d."""
+    return (d.toordinal() - _EPOCH_ORDINAL) * 86400
+
+def day_of(secs):
+    """"YYYY-mm-dd" of a wall-clock timestamp (cached, it is asked for every row)."""
+    n = secs // 86400
+    name = _day_names.get(n)
+    if name is None:
+        name = _day_names[n] = date.fromordinal(n + _EPOCH_ORDINAL).isoformat()
+    return name
+
+def format_ts(secs):
+    """Wall-clock seconds -> "YYYY-mm-dd HH:MM:SS"."""
+    return (_EPOCH + timedelta(seconds=secs)).strftime("%Y-%m-%d %H:%M:%S")
+
+def parse_legacy_ts(value):
+    """"YYYY-mm-dd HH:MM:SS" -> wall-clock seconds by slicing, much cheaper than strptime."""
+    if (len(value) != 19 or value[4] != "-" or value[7] != "-" or value[10] != " "
+            or value[13] != ":" or value[16] != ":"):
+        raise ValueError(f"bad timestamp: {value!r}")
+    return ((date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal() - _EPOCH_ORDINAL) * 86400
+            + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19]))
+
+def format_version(header):
+    """Row format of a log file from its header (an empty file counts as current)."""
+    if not header or len(header) < len(FIELDNAMES):
+        return FORMAT_VERSION
+    if header[0] == FIELDNAMES_V1[0]:
+        return 1
+    if header[3] == FIELDNAMES_V2[3]:
+        return 2
+    return 3
+
+def parse_row(values, version):
+    """
+    Raw CSV values -> (ts_start, ts_end, duration_secs, app, title, phase),
+    or None if the timestamps (or v3 ids) are malformed. app and title are
+    names for v1/v2 rows and string table ids for v3 rows.
+    """
+    if len(values) < len(FIELDNAMES):
+        return None
+    try:
+        if version == 1:
+            start = parse_legacy_ts(values[0])
+            end = parse_legacy_ts(values[1])
+        else:
+            start = int(values[0])
+            end = int(values[1])
+        if version >= 3:
+            app, title = int(values[3]), int(values[4])
+        else:
+            app, title = values[3], values[4]
+    except ValueError:
+        return None
+    try:
+        duration = int(values[2])
+    except ValueError:
+        duration = 0
+    return (start, end, duration, app, title, values[5] or "unscheduled")
+
+def encode_record(record):
+    """Record with names -> record with string table ids."""
+    start, end, duration, app, title, phase = record
+    return (start, end, duration, strings.intern(app), strings.intern(title), phase)
+
+def decode_record(record, table=strings):
+    """Record with string table ids -> record with names."""
+    start, end, duration, app, title, phase = record
+    return (start, end, duration, table.lookup(app), table.lookup(title), phase)
+
+def read_header(path):
+    """First row of a log file, or None if it is empty."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+def read_records(path, ids=False, table=None):
+    """
+    Yield parsed records from a log file of any version, with app and title
+    as names, or as string table ids if ids=True. `table` is the StringTable
+    v3 ids are decoded with when the file comes from another machine.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        version = format_version(next(reader, None))
+        convert = None
+        if ids and version < 3:
+            convert = encode_record
+        elif not ids and version >= 3:
+            convert = decode_record if table is None else lambda record: decode_record(record, table)
+        for values in reader:
+            record = parse_row(values, version)
+            if record is not None:
+                yield convert(record) if convert else record
+
+# Phase <-> the small int EventBuffer stores. Kept apart from the string
+# table, which only holds app names and window titles.
+_phases = ["work", "break", "unscheduled"]
+_phase_codes = {phase: code for code, phase in enumerate(_phases)}
+_phase_lock = threading.Lock()
+
+def _phase_code(phase):
+    code = _phase_codes.get(phase)
+    if code is None:
+        with _phase_lock:
+            code = _phase_codes.get(phase)
+            if code is None:
+                code = _phase_codes[phase] = len(_phases)
+                _phases.append(phase)
+    return code
+
+class EventBuffer:
+    """
+    Log events waiting to be written, packed six int64s per event into one
+    array: the FIELDNAMES columns with the phase as a small int code.
+    Appending keeps no Python object per event; records() builds the tuples
+    only when the writer needs them.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = array("q")
+
+    def append(self, start, end, duration, app_id, title_id, phase):
+        self._data.extend((start, end, duration, app_id, title_id, _phase_code(phase)))
+
+    def extend(self, other):
+        self._data.extend(other._data)
+
+    def clear(self):
+        del self._data[:]
+
+    def __len__(self):
+        return len(self._data) // 6
+
+    def records(self, start=0):
+        """Events from index `start` on, as id-encoded records."""
+        it = iter(self._data[start * 6:])
+        phases = _phases
+        return [(s, e, d, app, title, phases[phase]) for s, e, d, app, title, phase in zip(it, it, it, it, it, it)]
@@ -1,96 +1,837 @@
 # logger.py
 import csv
+import io
+import json
 import os
 from datetime import datetime, date, timedelta
-from config import WORK_DURATION, LOG_PATH
+from config import (WORK_DURATION, LOG_PATH, LOG_DIR, LOG_BACKEND, LOG_DURABILITY, JOURNAL_PATH,
+                    WRITER_QUEUE_ROWS, WRITER_BATCH_ROWS, WRITER_FLUSH_SECS,
+                    RAW_RETENTION_DAYS, HOURLY_RETENTION_DAYS, PARALLEL_SCAN_BYTES, SCAN_WORKERS)
+from logformat import (FIELDNAMES, FORMAT_VERSION, EventBuffer, day_of, decode_record, encode_record, format_version,
+                       parse_row, read_header, read_records, wall_seconds)
+from strtable import strings
 from collections import defaultdict, Counter
 import threading
+import time
+import metrics
+
+# numpy is optional and only imported the first time a big batch is folded
+np = None
+_numpy_checked = False
+
+def _numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # rollups fall back to the pure-Python fold
+            pass
+    return np
+
+if LOG_BACKEND == "sqlite":
+    import sqlite_store
 
 # Separate locks: one for the in-memory buffer, none for CSV reads.
+# The buffer is bounded; log_event drops (and counts) rows rather than wait.
 buffer_lock = threading.Lock()
-log_buffer = []
+buffer_cond = threading.Condition(buffer_lock)
+log_buffer = EventBuffer()
+dropped_events = 0
 
-# Flush less often; 30–60s is plenty.
-BUFFER_FLUSH_INTERVAL = 30  # seconds
-# Compact no more than once per hour
+# Drains log_buffer in batches once started (see LogWriter)
+_writer = None
+# What init_log() is doing, for a status message while it runs
+init_status = ""
+# Compact no more than once per hour, and move at most this many days down
+# a retention tier per call so a long backlog never stalls the writer
 _COMPACT_EVERY_SECS = 3600
+_COMPACT_BATCH_DAYS = 7
 _last_compact_ts = 0
 
-def init_log():
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-    if not os.path.exists(LOG_PATH):
-        with open(LOG_PATH, mode='w', newline='', encoding='utf-8') as f:
+# Per-day totals kept up to date by flush_buffer so the summaries never
+# have to re-read the raw CSV. Each day's rollup sits next to its segment
+# as YYYY-mm-dd.rollup.json, together with how far into the segment it has
+# read. Apps are keyed by string table id; query() resolves the names.
+#   {"phases": {phase: secs}, "apps": {app_id: secs}, "titles": {title_id: secs},
+#    "hours": [{app_id: {phase: secs}}, ... 24 entries], "inode": int,
+#    "offset": int, "version": int}
+# Older days move down the retention tiers (see maybe_compact): past
+# RAW_RETENTION_DAYS the segment is deleted and the rollup is frozen without
+# titles ("tier": "hourly"); past HOURLY_RETENTION_DAYS only the day's
+# phases and apps are kept, in one YYYY.daily.json archive per year.
+rollup_lock = threading.Lock()
+_tails = {}            # day -> LogTail, cache of the .rollup.json files
+_dirty_days = set()    # days changed since the last save
+_archives = {}         # year -> {day: rollup}, cache of the .daily.json files
+
+def _segment_path(day):
+    return os.path.join(LOG_DIR, day + ".csv")
+
+def _rollup_path(day):
+    return os.path.join(LOG_DIR, day + ".rollup.json")
+
+def _archive_path(year):
+    return os.path.join(LOG_DIR, year + ".daily.json")
+
+def segment_days():
+    """Sorted list of the days that have a log segment on disk."""
+    try:
+        names = os.listdir(LOG_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-4] for name in names if name.endswith(".csv"))
+
+def _new_day():
+    return {"phases": {}, "apps": {}, "titles": {}, "hours": [{} for _ in range(24)]}
+
+def _daily_rollup(phases, apps):
+    """A rollup from the per-day tier: totals only, no titles or hours."""
+    return {"phases": phases, "apps": apps, "titles": {}, "hours": [{} for _ in range(24)]}
+
+def _add_to_rollup(day, record):
+    """Fold one id-encoded record into a day's rollup (same rules as the old CSV scans)."""
+    start, end, duration, app_name, title, phase = record
+
+    day["phases"][phase] = day["phases"].get(phase, 0) + duration
+    day["apps"][app_name] = day["apps"].get(app_name, 0) + duration
+    day["titles"][title] = day["titles"].get(title, 0) + duration
+
+    # Split the interval on hour boundaries for the hourly graph
+    current = start
+    while current < end:
+        segment_end = min(current - current % 3600 + 3600, end)
+        hour = day["hours"][current % 86400 // 3600]
+        phases = hour.get(app_name)
+        if phases is None:
+            phases = hour[app_name] = {}
+        phases[phase] = phases.get(phase, 0) + segment_end - current
+        current = segment_end
+
+# Below this many rows the per-row loop is cheaper than building arrays
+_VECTOR_MIN_ROWS = 256
+
+def _fold_rows_numpy(day, rows, version=FORMAT_VERSION):
+    """
+    Vectorized _add_to_rollup for a batch of raw rows (CSV value lists).
+    Raises ValueError on anything malformed so the caller can fall back.
+    """
+    cols = list(zip(*rows))
+    if len(cols) < len(FIELDNAMES):
+        raise ValueError("malformed row")
+    if version == 1:
+        # Wall-clock seconds: the local timestamps read as if they were UTC
+        starts = np.array(cols[0], dtype="datetime64[s]").astype(np.int64)
+        ends = np.array(cols[1], dtype="datetime64[s]").astype(np.int64)
+    else:
+        starts = np.fromiter(map(int, cols[0]), np.int64, len(rows))
+        ends = np.fromiter(map(int, cols[1]), np.int64, len(rows))
+    durations = np.fromiter(map(int, cols[2]), np.int64, len(rows))
+
+    app_index = {}
+    app_ids = np.array([app_index.setdefault(app, len(app_index)) for app in cols[3]], dtype=np.int64)
+    phase_index = {}
+    phase_ids = np.array([phase_index.setdefault(phase or "unscheduled", len(phase_index)) for phase in cols[5]],
+                         dtype=np.int64)
+    title_index = {}
+    title_nums = np.array([title_index.setdefault(title, len(title_index)) for title in cols[4]], dtype=np.int64)
+    # Group by the raw column values, then map each group to its id once
+    to_id = int if version >= 3 else strings.intern
+    apps = [to_id(app) for app in app_index]
+    titles = [to_id(title) for title in title_index]
+    n_apps = len(apps)
+
+    app_totals = np.bincount(app_ids, weights=durations, minlength=n_apps)
+    title_totals = np.bincount(title_nums, weights=durations, minlength=len(titles))
+    phase_totals = np.bincount(phase_ids, weights=durations, minlength=len(phase_index))
+
+    # Clip every interval to the hour boundaries it crosses: repeat each row
+    # once per hour it touches, then trim the first and last piece.
+    valid = ends > starts
+    starts, ends, app_ids, phase_ids = starts[valid], ends[valid], app_ids[valid], phase_ids[valid]
+    first_hour = starts // 3600
+    n_hours = (ends - 1) // 3600 - first_hour + 1
+    row_idx = np.repeat(np.arange(len(starts)), n_hours)
+    hour_abs = first_hour[row_idx] + (np.arange(len(row_idx)) - np.repeat(np.cumsum(n_hours) - n_hours, n_hours))
+    piece = (np.minimum(ends[row_idx], (hour_abs + 1) * 3600)
+             - np.maximum(starts[row_idx], hour_abs * 3600))
+    n_phases = len(phase_index)
+    hourly = np.bincount(((hour_abs % 24) * n_apps + app_ids[row_idx]) * n_phases + phase_ids[row_idx],
+                         weights=piece, minlength=24 * n_apps * n_phases).reshape(24, n_apps, n_phases)
+
+    for phase, secs in zip(phase_index, np.rint(phase_totals).astype(np.int64).tolist()):
+        day["phases"][phase] = day["phases"].get(phase, 0) + secs
+    for app, secs in zip(apps, np.rint(app_totals).astype(np.int64).tolist()):
+        day["apps"][app] = day["apps"].get(app, 0) + secs
+    for title, secs in zip(titles, np.rint(title_totals).astype(np.int64).tolist()):
+        day["titles"][title] = day["titles"].get(title, 0) + secs
+    hourly = np.rint(hourly).astype(np.int64)
+    phase_names = list(phase_index)
+    for hour_num, app_num, phase_num in zip(*np.nonzero(hourly)):
+        phases = day["hours"][hour_num].setdefault(apps[app_num], {})
+        phase = phase_names[phase_num]
+        phases[phase] = phases.get(phase, 0) + int(hourly[hour_num, app_num, phase_num])
+
+def _fold_rows(day, rows, version=FORMAT_VERSION):
+    """Fold a batch of raw rows into a day's rollup, vectorized when it pays off."""
+    if len(rows) >= _VECTOR_MIN_ROWS and _numpy() is not None:
+        try:
+            # Only touches the rollup once every array has been built
+            _fold_rows_numpy(day, rows, version)
+            return
+        except ValueError:
+            pass
+    for values in rows:
+        record = parse_row(values, version)
+        if record is not None:
+            _add_to_rollup(day, record if version >= 3 else encode_record(record))
+
+def _merge_rollup(day, part):
+    """Add a partial rollup (e.g. of one byte range) into a day's rollup; the sums are exact."""
+    for key in ("phases", "apps", "titles"):
+        if key in part:
+            totals = day[key]
+            for name, secs in part[key].items():
+                totals[name] = totals.get(name, 0) + secs
+    for hour, part_hour in zip(day["hours"], part["hours"]):
+        for app, part_phases in part_hour.items():
+            phases = hour.setdefault(app, {})
+            for phase, secs in part_phases.items():
+                phases[phase] = phases.get(phase, 0) + secs
+
+def _fold_range(path, start, end, version):
+    """
+    Rollup of the complete rows in bytes [start, end) of a segment, and how
+    many bytes they span. Runs in a scan worker process.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    size = data.rfind(b"\n") + 1
+    day = _new_day()
+    reader = csv.reader(io.StringIO(data[:size].decode("utf-8", errors="replace"), newline=""))
+    _fold_rows(day, list(reader), version)
+    return day, size
+
+# Bumped when the saved rollup layout changes; older files are rebuilt.
+# Frozen (hourly tier) rollups have no segment left to rebuild from, so a
+# bump must convert those instead.
+_ROLLUP_VERSION = 4
+
+class LogTail:
+    """
+    Incremental reader for one append-only segment.
+
+    Remembers the byte offset it has parsed up to and the running rollup of
+    those rows, so refresh() only parses what was appended since. A segment
+    that was replaced (new inode) or truncated is re-read from the start.
+    A frozen tail (hourly tier) no longer has a segment and never changes.
+    """
+
+    def __init__(self, path, rollup=None, inode=None, offset=0, frozen=False):
+        self.path = path
+        self.rollup = rollup if rollup is not None else _new_day()
+        self.inode = inode
+        self.offset = offset
+        self.frozen = frozen
+        self.version = None  # row format, from the segment's header
+
+    def freeze(self):
+        """Keep only what the hourly tier stores; the segment is about to go."""
+        self.rollup["titles"] = {}
+        self.inode = None
+        self.offset = 0
+        self.frozen = True
+
+    def check_replaced(self, st):
+        """Start over if the segment (os.stat result) was replaced or truncated. Returns True if so."""
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.rollup = _new_day()
+            self.inode = st.st_ino
+            self.offset = 0
+            return True
+        return False
+
+    def refresh(self):
+        """Fold newly appended rows into the rollup. Returns True if anything changed."""
+        if self.frozen:
+            return False
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        changed = self.check_replaced(st)
+        if st.st_size == self.offset:
+            return changed
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        # Only consume complete lines; a half-written row waits for next time
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return changed
+        reader = csv.reader(io.StringIO(data[:end].decode("utf-8", errors="replace"), newline=""))
+        if self.offset == 0:
+            self.version = format_version(next(reader, None))
+        elif self.version is None:
+            self.version = format_version(read_header(self.path))
+        _fold_rows(self.rollup, list(reader), self.version)
+        self.offset += end
+        return True
+
+    def to_json(self):
+        if self.frozen:
+            return dict(self.rollup, tier="hourly", version=_ROLLUP_VERSION)
+        return dict(self.rollup, inode=self.inode, offset=self.offset, version=_ROLLUP_VERSION)
+
+    @classmethod
+    def from_json(cls, path, data):
+        if data.get("version") != _ROLLUP_VERSION:
+            # Written by an older version (app names, no titles): rebuilt from the segment
+            raise ValueError("old rollup format")
+        # JSON object keys are strings; the ids are ints again in memory
+        rollup = {
+            "phases": data["phases"],
+            "apps": {int(app): secs for app, secs in data["apps"].items()},
+            "titles": {int(title): secs for title, secs in data["titles"].items()},
+            "hours": [{int(app): phases for app, phases in hour.items()} for hour in data["hours"]],
+        }
+        return cls(path, rollup, data.get("inode"), data.get("offset", 0), data.get("tier") == "hourly")
+
+def _write_json(path, data):
+    """Atomically replace path with data. Returns False if it could not be written."""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return False
+
+def _save_rollups():
+    """Write the changed days' rollups (atomic replace). Call with rollup_lock held."""
+    # Folding older segments may have interned new names the rollups refer to
+    strings.save()
+    for day in list(_dirty_days):
+        _dirty_days.discard(day)
+        tail = _tails.get(day)
+        if tail is not None:
+            _write_json(_rollup_path(day), tail.to_json())
+
+def _archive(year):
+    """
+    {day: rollup} for the year's days in the per-day tier, or None if the
+    archive exists but can't be read (it is then never overwritten).
+    Call with rollup_lock held.
+    """
+    days = _archives.get(year)
+    if days is None:
+        try:
+            with open(_archive_path(year), encoding="utf-8") as f:
+                data = json.load(f)
+            days = {day: _daily_rollup(totals["phases"], {int(app): secs for app, secs in totals["apps"].items()})
+                    for day, totals in data.items()}
+        except FileNotFoundError:
+            days = {}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+        _archives[year] = days
+    return days
+
+def _save_archive(year):
+    days = _archives[year]
+    return _write_json(_archive_path(year), {day: {"phases": days[day]["phases"], "apps": days[day]["apps"]}
+                                             for day in sorted(days)})
+
+def _tail(day):
+    """The day's LogTail, loaded from its saved rollup if needed; None without a rollup or segment."""
+    tail = _tails.get(day)
+    if tail is None:
+        path = _segment_path(day)
+        try:
+            with open(_rollup_path(day), encoding="utf-8") as f:
+                tail = LogTail.from_json(path, json.load(f))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            if not os.path.exists(path):
+                return None
+            tail = LogTail(path)
+        _tails[day] = tail
+    return tail
+
+def _get_day(day):
+    """
+    Up-to-date rollup for a day, or None if there is no data. Loads the saved
+    rollup and reads only what was appended to the segment since it was saved.
+    Days in the per-day tier come from their year's archive.
+    Call with rollup_lock held.
+    """
+    tail = _tail(day)
+    if tail is None:
+        archive = _archive(day[:4])
+        return archive.get(day) if archive else None
+    if tail.refresh():
+        _dirty_days.add(day)
+    return tail.rollup
+
+# Segments are split into byte ranges of about this size for the scan workers
+_SCAN_CHUNK_BYTES = 4 * 1024 * 1024
+
+def _scan_ranges(tail, size):
+    """Newline-aligned (start, end) byte ranges covering a tail's unread bytes, or None for old formats."""
+    with open(tail.path, "rb") as f:
+        start = tail.offset
+        if start == 0:
+            header = f.readline()
+            tail.version = format_version(next(csv.reader([header.decode("utf-8", errors="replace")]), None))
+            start = f.tell()
+        elif tail.version is None:
+            tail.version = format_version(read_header(tail.path))
+        # Only v3 rows are safe to split at any newline: ids, never a quoted multi-line title
+        if tail.version < 3:
+            return None
+        ranges = []
+        while start < size:
+            end = start + _SCAN_CHUNK_BYTES
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = min(f.tell(), size)
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def _catch_up(days, workers=SCAN_WORKERS, min_bytes=PARALLEL_SCAN_BYTES):
+    """
+    Bring these days' rollups up to date before they are read. When at
+    least `min_bytes` are unread in total, the segments are split into
+    newline-aligned byte ranges that a process pool folds in parallel, and
+    the partial rollups are summed into the tails. Less than that (or an
+    old row format) is left to the serial read in _get_day.
+    Call with rollup_lock held.
+    """
+    pending = []
+    for day in days:
+        tail = _tail(day)
+        if tail is None or tail.frozen:
+            continue
+        try:
+            st = os.stat(tail.path)
+        except FileNotFoundError:
+            continue
+        if tail.check_replaced(st):
+            _dirty_days.add(day)
+        if st.st_size > tail.offset:
+            pending.append((day, tail, st.st_size))
+    if not pending or sum(size - tail.offset for _, tail, size in pending) < min_bytes:
+        return
+
+    jobs = []
+    for day, tail, size in pending:
+        ranges = _scan_ranges(tail, size)
+        if ranges is None:
+            continue
+        # Header already consumed: the first range starts after it
+        tail.offset = ranges[0][0] if ranges else size
+        jobs += [(day, tail, start, end) for start, end in ranges]
+    if not jobs:
+        return
+
+    # Imported here: only this rare path needs them, and they slow startup
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # spawn, like Windows everywhere: this runs on a thread of a threaded process
+    context = multiprocessing.get_context("spawn")
+    with metrics.timer("logger.parallel_scan"):
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(_fold_range, [tail.path for _, tail, _, _ in jobs],
+                                        [start for _, _, start, _ in jobs], [end for _, _, _, end in jobs],
+                                        [tail.version for _, tail, _, _ in jobs], chunksize=1))
+        except (OSError, RuntimeError):
+            # No worker processes here: _get_day reads serially instead
+            return
+    # Ranges of a segment come back in order; a torn last row stays unread
+    for (day, tail, start, end), (part, size) in zip(jobs, results):
+        if tail.offset != start:
+            continue
+        _merge_rollup(tail.rollup, part)
+        tail.offset = start + size
+        _dirty_days.add(day)
+
+def save_rollups():
+    """Persist rollups that queries brought up to date (e.g. from a report run)."""
+    with rollup_lock:
+        _save_rollups()
+
+def rebuild_rollups():
+    """Recompute every day's rollup from its segment (only needed if they are lost)."""
+    with rollup_lock:
+        _tails.clear()
+        days = segment_days()
+        for day in days:
+            _tails[day] = LogTail(_segment_path(day))
+        _catch_up(days)
+        for day in days:
+            _get_day(day)
+        _save_rollups()
+
+def _write_segments(records, fsync=False):
+    """Append id-encoded records to their day's segment, creating it with a header if new."""
+    # The ids must be on disk before any row that uses them
+    strings.save(fsync=fsync)
+    by_day = defaultdict(list)
+    for record in records:
+        by_day[day_of(record[0])].append(record)
+    for day, day_records in by_day.items():
+        path = _segment_path(day)
+        new_file = not os.path.exists(path)
+        with open(path, mode="a", newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            writer.writerow(["timestamp_start", "timestamp_end", "duration_secs", "app_name", "window_title", "phase"])
+            if new_file:
+                writer.writerow(FIELDNAMES)
+            writer.writerows(day_records)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+def _migrate_legacy_log():
+    """Split a pre-segment usage_log.csv into per-day segments (one time)."""
+    global init_status
+    batch = []
+    count = 0
+    for record in read_records(LOG_PATH, ids=True):
+        batch.append(record)
+        if len(batch) >= 10000:
+            _write_segments(batch)
+            count += len(batch)
+            init_status = f"Migrating usage log: {count:,} rows"
+            batch.clear()
+    _write_segments(batch)
+    # Keep the old file around rather than deleting user data
+    os.replace(LOG_PATH, LOG_PATH + ".migrated")
+
+def _upgrade_legacy_segments():
+    """Rewrite segments in an older row format (timestamp strings, inline names) in the current one."""
+    global init_status
+    upgraded = False
+    for day in segment_days():
+        path = _segment_path(day)
+        try:
+            if format_version(read_header(path)) == FORMAT_VERSION:
+                continue
+            init_status = f"Upgrading usage log: {day}"
+            tmp_path = path + ".tmp"
+            with open(tmp_path, mode="w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(FIELDNAMES)
+                writer.writerows(read_records(path, ids=True))
+            strings.save()
+            os.replace(tmp_path, path)
+            upgraded = True
+        except OSError:
+            continue
+    return upgraded
+
+def _journal_append(records):
+    """Durably append rows not yet in the log to the journal."""
+    strings.save(fsync=True)
+    os.makedirs(os.path.dirname(JOURNAL_PATH) or ".", exist_ok=True)
+    with open(JOURNAL_PATH, mode="a", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(records)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _journal_clear():
+    try:
+        os.remove(JOURNAL_PATH)
+    except FileNotFoundError:
+        pass
 
-def _append_rows(rows):
-    """Append rows atomically by opening in append mode (single writer)."""
-    if not rows:
+def _replay_journal():
+    """Commit rows a crash left in the journal, skipping any already written."""
+    try:
+        with open(JOURNAL_PATH, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
         return
-    with open(LOG_PATH, mode="a", newline='', encoding='utf-8') as f:
-        fieldnames = ["timestamp_start", "timestamp_end", "duration_secs", "app_name", "window_title", "phase"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        # Header already exists
-        writer.writerows(rows)
-
-def flush_buffer():
-    """Fast flush: pop the memory buffer and append rows. No global CSV lock."""
-    global _last_compact_ts
-    # Pop entries quickly under buffer lock
+    # A torn last line was never acknowledged; drop it
+    text = data[:data.rfind(b"\n") + 1].decode("utf-8", errors="replace")
+    records = [r for r in map(lambda v: parse_row(v, FORMAT_VERSION), csv.reader(io.StringIO(text))) if r]
+
+    # The crash may have come after the batch was written but before the
+    # journal was cleared
+    if LOG_BACKEND == "sqlite":
+        records = [r for r in records if not sqlite_store.contains(decode_record(r))]
+    else:
+        written = set()
+        for day in {day_of(r[0]) for r in records}:
+            try:
+                written.update(read_records(_segment_path(day), ids=True))
+            except FileNotFoundError:
+                pass
+        records = [r for r in records if r not in written]
+    if records:
+        _commit(records, fsync=True)
+    _journal_clear()
+
+def init_log():
+    global init_status
+    init_status = "Opening usage log"
+    if LOG_BACKEND == "sqlite":
+        sqlite_store.init_db()
+    else:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        migrated = os.path.exists(LOG_PATH)
+        if migrated:
+            _migrate_legacy_log()
+        # New inodes make the day's LogTail re-read the rewritten segment
+        if _upgrade_legacy_segments() or migrated:
+            init_status = "Rebuilding usage summaries"
+            rebuild_rollups()
+    init_status = "Replaying unsaved usage"
+    _replay_journal()
+    init_status = "Usage log ready"
+
+@metrics.timed("logger.commit")
+def _commit(records, fsync=False):
+    """Write one batch to the log backend and bring the rollups up to date."""
+    metrics.incr("logger.rows_flushed", len(records))
+    if LOG_BACKEND == "sqlite":
+        # One batched transaction; the SQL aggregates replace the rollups.
+        # The database keeps names so its queries need no string table.
+        sqlite_store.insert_rows([decode_record(record) for record in records])
+        return
+
+    _write_segments(records, fsync=fsync)
+
+    # Keep the rollups in step: the tails read back just the appended bytes
+    with rollup_lock:
+        for day in {day_of(record[0]) for record in records}:
+            _get_day(day)
+        _save_rollups()
+
+def _take_buffer():
     with buffer_lock:
-        if not log_buffer:
-            return
-        to_write = list(log_buffer)
+        records = log_buffer.records()
         log_buffer.clear()
+    return records
 
-    # Append to disk (fast)
-    _append_rows(to_write)
+@metrics.timed("logger.flush_buffer")
+def flush_buffer(wait=False):
+    """
+    Ask the writer thread to commit everything buffered so far; with
+    wait=True, block until it has. Without a running writer the buffer is
+    committed on the calling thread.
+    """
+    if _writer is not None:
+        _writer.flush(wait)
+        return
+    records = _take_buffer()
+    if records:
+        _commit(records, fsync=LOG_DURABILITY != "none")
 
+class LogWriter:
+    """
+    Single thread that turns log_buffer into batched writes.
+
+    A batch is committed once it holds WRITER_BATCH_ROWS rows, once its
+    oldest row has waited WRITER_FLUSH_SECS, or when a flush is requested.
+    LOG_DURABILITY picks what a crash can lose: "none" leaves batches to
+    the OS, "fsync" syncs each batch, and "journal" also syncs every row to
+    a small journal as soon as it arrives. Compaction runs here too, so
+    none of the disk work happens on the tracker thread.
+    """
+
+    def __init__(self, durability=LOG_DURABILITY, batch_rows=WRITER_BATCH_ROWS, flush_secs=WRITER_FLUSH_SECS):
+        self.durability = durability
+        self.batch_rows = batch_rows
+        self.flush_secs = flush_secs
+        self._flush_seq = 0     # flush requests made
+        self._done_seq = 0      # flush requests satisfied
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def flush(self, wait=False, timeout=None):
+        with buffer_cond:
+            self._flush_seq += 1
+            seq = self._flush_seq
+            buffer_cond.notify_all()
+            if wait:
+                buffer_cond.wait_for(lambda: self._done_seq >= seq or not self._thread.is_alive(), timeout)
+
+    def stop(self, timeout=10):
+        """Commit what is left and end the thread."""
+        with buffer_cond:
+            self._stopped = True
+            buffer_cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        batch = EventBuffer()
+        journaled = 0
+        deadline = None
+        failed = False  # last write failed: nothing is retried before the deadline
+        while True:
+            with buffer_cond:
+                while True:
+                    if log_buffer:
+                        if not batch:
+                            deadline = time.monotonic() + self.flush_secs
+                        batch.extend(log_buffer)
+                        log_buffer.clear()
+                    stopping = self._stopped
+                    flush_seq = self._flush_seq
+                    due = batch and time.monotonic() >= deadline
+                    commit = (stopping or flush_seq > self._done_seq or due
+                              or (not failed and len(batch) >= self.batch_rows))
+                    if commit or (not failed and self.durability == "journal" and len(batch) > journaled):
+                        break
+                    buffer_cond.wait(deadline - time.monotonic() if batch else None)
+
+            try:
+                if self.durability == "journal" and len(batch) > journaled:
+                    _journal_append(batch.records(journaled))
+                    journaled = len(batch)
+                if commit and batch:
+                    _commit(batch.records(), fsync=self.durability != "none")
+                    if self.durability == "journal":
+                        _journal_clear()
+                    batch.clear()
+                    journaled = 0
+                if commit:
+                    maybe_compact()
+                failed = False
+            except Exception:
+                # Keep the rows and retry on the next commit; the journal
+                # (if any) still has them should the app go down first
+                metrics.incr("logger.write_errors")
+                deadline = time.monotonic() + self.flush_secs
+                failed = True
+
+            if commit:
+                with buffer_cond:
+                    self._done_seq = max(self._done_seq, flush_seq)
+                    buffer_cond.notify_all()
+            if stopping:
+                return
+
+def start_writer():
+    """Move log writes onto a LogWriter thread (call after init_log)."""
+    global _writer
+    if _writer is None:
+        _writer = LogWriter().start()
+    return _writer
+
+def stop_writer():
+    """Commit everything still buffered and stop the writer thread."""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+    flush_buffer()
+
+@metrics.timed("logger.maybe_compact")
 def maybe_compact():
     """
-    Occasionally prune rows older than 30 days.
-    Do this infrequently and NEVER on the GUI thread.
+    Occasionally move old days down the retention tiers, a few days per call:
+      raw segment -> hourly rollup   after RAW_RETENTION_DAYS (titles dropped)
+      hourly rollup -> daily totals  after HOURLY_RETENTION_DAYS (hours dropped)
+    A raw day already past HOURLY_RETENTION_DAYS goes down both steps in the
+    same call, as in sqlite_store.compact(). Each step writes the smaller
+    tier before removing the larger one, so a step cut short by a crash is
+    simply done again on the next call.
     """
     global _last_compact_ts
     now = datetime.now().timestamp()
     if now - _last_compact_ts < _COMPACT_EVERY_SECS:
         return
-    _last_compact_ts = now
 
-    cutoff = datetime.now() - timedelta(days=30)
-    tmp_path = LOG_PATH + ".tmp"
+    today = date.today()
+    raw_cutoff = today - timedelta(days=RAW_RETENTION_DAYS)
+    hourly_cutoff = today - timedelta(days=HOURLY_RETENTION_DAYS)
+    if LOG_BACKEND == "sqlite":
+        sqlite_store.compact(raw_cutoff, hourly_cutoff)
+        _last_compact_ts = now
+        return
 
+    raw_cutoff = raw_cutoff.strftime("%Y-%m-%d")
+    hourly_cutoff = hourly_cutoff.strftime("%Y-%m-%d")
     try:
-        with open(LOG_PATH, newline='', encoding='utf-8') as src, \
-             open(tmp_path, mode='w', newline='', encoding='utf-8') as dst:
-            reader = csv.DictReader(src)
-            fieldnames = reader.fieldnames or ["timestamp_start", "timestamp_end", "duration_secs", "app_name", "window_title", "phase"]
-            writer = csv.DictWriter(dst, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in reader:
-                try:
-                    row_end = datetime.strptime(row["timestamp_end"], "%Y-%m-%d %H:%M:%S")
-                    if row_end >= cutoff:
-                        writer.writerow(row)
-                except Exception:
-                    # If a row is malformed, keep it (safer than data loss)
-                    writer.writerow(row)
-        # Atomic replace so readers never see a half-written file
-        os.replace(tmp_path, LOG_PATH)
+        names = os.listdir(LOG_DIR)
     except FileNotFoundError:
-        # Nothing to compact
-        try:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
-    except Exception:
-        # On any error, try to clean temp; leave original file untouched
-        try:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
+        return
+    segments = {name[:-4] for name in names if name.endswith(".csv")}
+    to_hourly = sorted(day for day in segments if day < raw_cutoff)
+    to_daily = sorted(name[:10] for name in names
+                      if name.endswith(".rollup.json") and name[:10] < hourly_cutoff and name[:10] not in segments)
+
+    with rollup_lock:
+        to_hourly, rest = to_hourly[:_COMPACT_BATCH_DAYS], to_hourly[_COMPACT_BATCH_DAYS:]
+        for day in to_hourly:
+            _to_hourly(day)
+        through = [day for day in to_hourly if day < hourly_cutoff and not os.path.exists(_segment_path(day))]
+        budget = _COMPACT_BATCH_DAYS - len(to_hourly)
+        to_daily, rest = through + to_daily[:budget], rest + to_daily[budget:]
+        _to_daily(to_daily)
+    if not rest:
+        # Caught up; otherwise the next call carries on with the backlog
+        _last_compact_ts = now
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _to_hourly(day):
+    """Freeze a day's rollup into the hourly tier and delete its segment. Call with rollup_lock held."""
+    tail = _tails.get(day) if _get_day(day) is not None else None
+    if tail is None:
+        return
+    if not tail.frozen:
+        tail.freeze()
+    _dirty_days.discard(day)
+    strings.save()
+    if _write_json(_rollup_path(day), tail.to_json()):
+        _remove(_segment_path(day))
+
+def _to_daily(days):
+    """Move hourly-tier days into their year's archive of per-day totals. Call with rollup_lock held."""
+    by_year = defaultdict(list)
+    for day in days:
+        by_year[day[:4]].append(day)
+    for year, year_days in by_year.items():
+        archive = _archive(year)
+        if archive is None:
+            continue
+        moved = []
+        for day in year_days:
+            if day not in archive:
+                rollup = _get_day(day)
+                if day not in _tails:
+                    continue  # unreadable rollup: left where it is
+                archive[day] = _daily_rollup(rollup["phases"], rollup["apps"])
+            moved.append(day)
+        if moved and _save_archive(year):
+            for day in moved:
+                _tails.pop(day, None)
+                _dirty_days.discard(day)
+                _remove(_rollup_path(day))
 
 def log_event(start_time, end_time, app_name, window_title, phase, paused=False):
     if paused:
@@ -100,122 +841,130 @@ def log_event(start_time, end_time, app_name, window_title, phase, paused=False)
     if duration < 1:
         return
 
-    entry = {
-        "timestamp_start": start_time.strftime("%Y-%m-%d %H:%M:%S"),
-        "timestamp_end": end_time.strftime("%Y-%m-%d %H:%M:%S"),
-        "duration_secs": str(duration),
-        "app_name": app_name,
-        "window_title": window_title,
-        "phase": phase
-    }
-
-    # Only protect memory buffer (tiny critical section)
-    with buffer_lock:
-        log_buffer.append(entry)
+    # Epoch ints and string table ids; nothing is formatted per event
+    start, end = wall_seconds(start_time), wall_seconds(end_time)
+    app_id, title_id = strings.intern(app_name), strings.intern(window_title)
 
-# app_usage_summary / summarize_today / summarize_week:
-# - remove `with csv_lock:`
-# - keep the rest as-is
+    # Only protect memory buffer (tiny critical section); never wait on disk
+    global dropped_events
+    with buffer_cond:
+        if len(log_buffer) >= WRITER_QUEUE_ROWS:
+            dropped_events += 1
+            metrics.incr("logger.dropped_events")
+            return
+        log_buffer.append(start, end, duration, app_id, title_id, phase)
+        buffer_cond.notify()
 
-def app_usage_summary(period="daily"):
-    from collections import defaultdict, Counter
-    from datetime import datetime, date, timedelta
+# Aggregates understood by query()
+QUERY_AGGREGATES = ("phases", "top_apps", "hourly", "cycles")
 
+def period_range(period="daily"):
+    """Return the (start_date, end_date) covered by the "daily" or "weekly" view."""
     today = date.today()
-    start_date = today if period == "daily" else (today - timedelta(days=today.weekday()))
+    if period == "daily":
+        return today, today
+    return today - timedelta(days=today.weekday()), today
 
-    top_apps_counter = Counter()
-    hourly_usage = defaultdict(lambda: defaultdict(int))
+def query(start_date, end_date, aggregates=QUERY_AGGREGATES, top_n=5):
+    """
+    Compute the requested aggregates for [start_date, end_date] in one pass.
 
-    try:
-        with open(LOG_PATH, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                row_start = datetime.strptime(row["timestamp_start"], "%Y-%m-%d %H:%M:%S")
-                if row_start.date() < start_date:
-                    continue
-                app_name = row["app_name"]
-                duration = int(row.get("duration_secs", 0))
-                top_apps_counter[app_name] += duration
-
-                end_time = datetime.strptime(row["timestamp_end"], "%Y-%m-%d %H:%M:%S")
-                current = row_start
-                while current < end_time:
-                    hour = current.hour
-                    next_hour = (current.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
-                    segment_end = min(next_hour, end_time)
-                    duration_sec = int((segment_end - current).total_seconds())
-                    if duration_sec > 0:
-                        hourly_usage[hour][app_name] += duration_sec
-                    current = segment_end
-    except FileNotFoundError:
-        pass
+    Returns a dict with one entry per requested aggregate:
+      "phases"   -> {"work": secs, "break": secs, "unscheduled": secs}
+      "cycles"   -> completed work cycles (work secs / WORK_DURATION)
+      "top_apps" -> [(app, secs), ...] for the top_n apps (all if top_n is None)
+      "top_titles" -> [(window_title, secs), ...] likewise
+      "hourly"   -> {hour: {app: secs}}
+      "daily"    -> {"YYYY-mm-dd": {"work": secs, ...}} for the days with data
 
-    return top_apps_counter.most_common(5), hourly_usage
+    Days past RAW_RETENTION_DAYS no longer count towards top_titles, and
+    days past HOURLY_RETENTION_DAYS no longer count towards hourly.
+    """
+    aggregates = set(aggregates)
+    if LOG_BACKEND == "sqlite":
+        return _finish_query(sqlite_store.query(start_date, end_date, aggregates, top_n), aggregates)
 
-def summarize_today():
-    today_str = date.today().strftime("%Y-%m-%d")
-    work_time = break_time = unscheduled_time = 0
+    want_phases = "phases" in aggregates or "cycles" in aggregates
+    want_apps = "top_apps" in aggregates
+    want_hourly = "hourly" in aggregates
+    want_titles = "top_titles" in aggregates
+    want_daily = "daily" in aggregates
 
-    try:
-        with open(LOG_PATH, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row["timestamp_start"].startswith(today_str):
-                    try:
-                        duration = int(row["duration_secs"])
-                    except ValueError:
-                        duration = 0
-                    phase = row.get("phase", "unscheduled")
-                    if phase == "work":
-                        work_time += duration
-                    elif phase == "break":
-                        break_time += duration
-                    elif phase == "unscheduled":
-                        unscheduled_time += duration
-    except FileNotFoundError:
-        pass
+    phase_totals = {"work": 0, "break": 0, "unscheduled": 0}
+    top_apps_counter = Counter()
+    top_titles_counter = Counter()
+    hourly_usage = defaultdict(lambda: defaultdict(int))
+    daily = {}
 
-    cycles = work_time / WORK_DURATION if WORK_DURATION > 0 else 0
+    with rollup_lock:
+        _catch_up([(start_date + timedelta(days=i)).strftime("%Y-%m-%d")
+                   for i in range((end_date - start_date).days + 1)])
+        current = start_date
+        while current <= end_date:
+            day_name = current.strftime("%Y-%m-%d")
+            day = _get_day(day_name)
+            current += timedelta(days=1)
+            if day is None:
+                continue
+            if want_daily:
+                daily[day_name] = {phase: day["phases"].get(phase, 0) for phase in phase_totals}
+            if want_titles:
+                top_titles_counter.update(day["titles"])
+            if want_phases:
+                for phase in phase_totals:
+                    phase_totals[phase] += day["phases"].get(phase, 0)
+            if want_apps:
+                top_apps_counter.update(day["apps"])
+            if want_hourly:
+                for hour, apps in enumerate(day["hours"]):
+                    for app_name, phases in apps.items():
+                        hourly_usage[hour][app_name] += sum(phases.values())
 
-    return {
-        "work": work_time,
-        "break": break_time,
-        "unscheduled": unscheduled_time,
-        "cycles": cycles,
-    }
+    # Everything above is keyed by app id; only the results need names
+    result = {"phases": phase_totals}
+    if want_apps:
+        result["top_apps"] = [(strings.lookup(app), secs) for app, secs in top_apps_counter.most_common(top_n)]
+    if want_titles:
+        result["top_titles"] = [(strings.lookup(title), secs)
+                                for title, secs in top_titles_counter.most_common(top_n)]
+    if want_daily:
+        result["daily"] = daily
+    if want_hourly:
+        named = defaultdict(lambda: defaultdict(int))
+        for hour, apps in hourly_usage.items():
+            for app, secs in apps.items():
+                named[hour][strings.lookup(app)] = secs
+        result["hourly"] = named
+    return _finish_query(result, aggregates)
 
-def summarize_week():
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-    start_of_week_str = start_of_week.strftime("%Y-%m-%d")
+def cycles_for(work_secs):
+    """Completed work cycles in `work_secs` of work, as the dashboard counts them."""
+    return work_secs / WORK_DURATION if WORK_DURATION > 0 else 0
 
-    work_time = break_time = unscheduled_time = 0
+def _finish_query(result, aggregates):
+    """Derive cycles from the phase totals and drop anything not requested."""
+    if "cycles" in aggregates:
+        result["cycles"] = cycles_for(result["phases"]["work"])
+    if "phases" not in aggregates:
+        result.pop("phases", None)
+    return result
 
-    try:
-        with open(LOG_PATH, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row["timestamp_start"][:10] >= start_of_week_str:
-                    try:
-                        duration = int(row["duration_secs"])
-                    except ValueError:
-                        duration = 0
-                    phase = row.get("phase", "unscheduled")
-                    if phase == "work":
-                        work_time += duration
-                    elif phase == "break":
-                        break_time += duration
-                    elif phase == "unscheduled":
-                        unscheduled_time += duration
-    except FileNotFoundError:
-        pass
+def dashboard_summary(period="daily"):
+    """Everything one dashboard refresh needs: (stats, top_apps, hourly_usage)."""
+    result = query(*period_range(period))
+    stats = dict(result["phases"], cycles=result["cycles"])
+    return stats, result["top_apps"], result["hourly"]
 
-    cycles = work_time / WORK_DURATION if WORK_DURATION > 0 else 0
+def app_usage_summary(period="daily"):
+    result = query(*period_range(period), aggregates=("top_apps", "hourly"))
+    return result["top_apps"], result["hourly"]
+
+def _phase_summary(period):
+    result = query(*period_range(period), aggregates=("phases", "cycles"))
+    return dict(result["phases"], cycles=result["cycles"])
 
-    return {
-        "work": work_time,
-        "break": break_time,
-        "unscheduled": unscheduled_time,
-        "cycles": cycles,
-    }
+def summarize_today():
+    return _phase_summary("daily")
+
+def summarize_week():
+    return _phase_summary("weekly")
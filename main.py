@@ -1,10 +1,14 @@
 import threading
-from timer import get_time_remaining
-from tracker import track_foreground
-from idle_tracker import get_idle_duration
-from gui import start_gui, show_kill_warning
+from timer import get_time_remaining, get_overtime, set_paused
+from tracker import ForegroundTracker
+from scheduler import Scheduler
+from sensors import SensorHub
+from gui import start_gui, show_kill_warning, run_with_status
 import state
-from config import AFK_TIMEOUT
+from config import TRACK_INTERVAL, BLOCK_INTERVAL
+from process_watcher import ProcessWatcher
+import metrics
+import logger
 import time
 import psutil
 import os
@@ -21,63 +25,87 @@ recent_warnings = set()
 WARNING_COOLDOWN = 5  # seconds
 last_warning_time = {}
 
+process_watcher = ProcessWatcher()
+# Idle time, foreground window, phase and pause flag, sampled once per period
+sensors = SensorHub()
+_was_enforcing = False
+
+@metrics.timed("blocker.enforce")
 def enforce_blocked_apps(root):
-    if state.current_phase != "work":
+    global _was_enforcing
+    if sensors.snapshot.phase != "work":
+        _was_enforcing = False
         return
 
-    blocked = {app.lower() for app in state.blocked_apps}
-    for proc in psutil.process_iter(['pid', 'name']):
+    # Re-check everything already running when a work phase starts;
+    # otherwise only processes started since the last scan.
+    hits = process_watcher.scan(state.blocked_apps, full=not _was_enforcing)
+    _was_enforcing = True
+    for pid, pname in hits:
+        if pid == current_pid:
+            continue
         try:
-            pname = (proc.info['name'] or "").lower()
-            if pname in blocked and proc.info['pid'] != os.getpid():
-                proc.kill()
-
-                now = time.time()
-                if state.show_warnings:
-                    last = last_warning_time.get(pname, 0)
-                    if now - last > WARNING_COOLDOWN:
-                        last_warning_time[pname] = now
-                        root.after(0, lambda p=pname: show_kill_warning(root, p))
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            proc = psutil.Process(pid)
+            if (proc.name() or "").lower() != pname:
+                # pid was reused by another process since it was cached
+                process_watcher.forget(pid)
+                continue
+            proc.kill()
+            metrics.incr("blocker.killed")
+
+            now = time.time()
+            if state.show_warnings:
+                last = last_warning_time.get(pname, 0)
+                if now - last > WARNING_COOLDOWN:
+                    last_warning_time[pname] = now
+                    root.after(0, lambda p=pname: show_kill_warning(root, p))
+        except psutil.NoSuchProcess:
+            continue
+        except psutil.AccessDenied:
+            # Try again on the next scan
+            process_watcher.forget(pid)
             continue
-
-def block_apps_loop(stop_event, root):
-    """Thread loop that enforces blocked apps every second."""
-    while not stop_event.is_set():
-        enforce_blocked_apps(root)
-        time.sleep(1)
 
 def get_phase():
-    return state.current_phase
+    return sensors.snapshot.phase
 
 def get_afk():
-    return get_idle_duration() >= AFK_TIMEOUT if state.current_phase == "work" else False
+    return sensors.snapshot.afk
+
+def get_idle():
+    return sensors.snapshot.idle_at(time.monotonic())
+
+def set_phase(new_phase):
+    state.current_phase = new_phase
+    sensors.refresh_state()
 
 def toggle_pause():
-    state.paused = not state.paused
+    set_paused(not state.paused)
+    sensors.refresh_state()
     return state.paused
 
 def is_unscheduled():
-    return state.paused or get_afk()
+    return sensors.snapshot.unscheduled
 
 if __name__ == "__main__":
+    # Lets the packaged exe act as a log scan worker (see logger._catch_up)
+    import multiprocessing
+    multiprocessing.freeze_support()
     root = tk.Tk()
 
     stop_event = threading.Event()
-
-    tracker_thread = threading.Thread(
-        target=track_foreground, 
-        args=(get_phase, is_unscheduled, stop_event),
-        daemon=True
-    )
-    tracker_thread.start()
-
-    block_thread = threading.Thread(
-        target=block_apps_loop, 
-        args=(stop_event, root),
-        daemon=True
-    )
-    block_thread.start()
+    metrics_thread = metrics.start(stop_event)
+
+    # Sensors, tracking and blocking share one scheduler thread and wake
+    # together; the sensors are registered first so they run first. The log
+    # is set up here, before that thread starts, so no job waits on it; a
+    # migration runs off the GUI thread while the window shows its progress.
+    tracker = ForegroundTracker(sensors)
+    run_with_status(root, tracker.open, lambda: logger.init_status)
+    scheduler = Scheduler().start()
+    scheduler.every(TRACK_INTERVAL, sensors.sample, "sensors")
+    scheduler.every(TRACK_INTERVAL, tracker.sample, "tracker")
+    scheduler.every(BLOCK_INTERVAL, lambda: enforce_blocked_apps(root), "blocker")
 
     # Start GUI
     start_gui(
@@ -86,12 +114,16 @@ if __name__ == "__main__":
         get_time_remaining,
         toggle_pause,
         is_unscheduled,
-        get_overtime=lambda: state.overtime,
-        set_phase=lambda new_phase: setattr(state, 'current_phase', new_phase),
+        get_overtime=get_overtime,
+        set_phase=set_phase,
         stop_event=stop_event,
-        root=root
+        root=root,
+        get_idle=get_idle
     )
 
-    # GUI closed → stop tracking
+    # GUI closed → stop tracking, then let the writer commit what is left
     stop_event.set()
-    tracker_thread.join()
+    scheduler.stop()
+    tracker.close()
+    if metrics_thread:
+        metrics_thread.join()
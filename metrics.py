@@ -0,0 +1,169 @@
+# metrics.py
+"""
+Counters and latency histograms for the timer, tracker, blocker and GUI loops.
+
+Everything is decided by config.METRICS_ENABLED at import time: when it is
+off, @timed returns the function unchanged and timer() hands back a shared
+no-op context manager, so instrumented code pays next to nothing.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from config import METRICS_ENABLED, METRICS_PATH, METRICS_DUMP_INTERVAL, METRICS_HTTP_PORT
+
+ENABLED = METRICS_ENABLED
+
+# Upper bounds of the latency buckets, in milliseconds (last one catches the rest)
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, float("inf"))
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": {f"le_{bound:g}": n for bound, n in zip(BUCKETS_MS, self.counts)},
+        }
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+def incr(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def observe(name, ms):
+    """Record one latency sample (milliseconds)."""
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(ms)
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name):
+    """Context manager timing a block into histogram `name`."""
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+def timed(name):
+    """Decorator timing every call into histogram `name`."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+def snapshot():
+    with _lock:
+        return {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "counters": dict(_counters),
+            "latency_ms": {name: hist.snapshot() for name, hist in _histograms.items()},
+        }
+
+def dump(path=METRICS_PATH):
+    """Append the current snapshot as one JSON line."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(snapshot(), separators=(",", ":")) + "\n")
+
+def _dump_loop(stop_event):
+    while not stop_event.wait(METRICS_DUMP_INTERVAL):
+        try:
+            dump()
+        except OSError:
+            pass
+    try:
+        dump()
+    except OSError:
+        pass
+
+def _serve(port, stop_event):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = json.dumps(snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    # Bound to localhost only; nothing here is meant for other machines
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    threading.Thread(target=lambda: (stop_event.wait(), server.shutdown()), daemon=True).start()
+    return server
+
+def start(stop_event):
+    """Start the periodic dump (and the HTTP endpoint if configured). No-op when disabled."""
+    if not ENABLED:
+        return None
+    thread = threading.Thread(target=_dump_loop, args=(stop_event,), name="metrics-dump", daemon=True)
+    thread.start()
+    if METRICS_HTTP_PORT:
+        _serve(METRICS_HTTP_PORT, stop_event)
+    return thread
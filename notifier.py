@@ -1,9 +1,11 @@
-from winotify import Notification, audio
 import os
 import threading
 import time
 
 def _show_notification(title, message):
+    # Imported on first use, off the GUI thread
+    from winotify import Notification, audio
+
     icon_path = os.path.join(os.path.dirname(__file__), "icon.ico")
     toast = Notification(
         app_id="Pomodoro Timer",
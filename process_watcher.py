@@ -0,0 +1,56 @@
+# process_watcher.py
+import psutil
+
+class ProcessWatcher:
+    """
+    Incremental view of running processes for blocked-app enforcement.
+
+    Keeps a pid -> lowercase name cache so each scan only looks up the names
+    of pids that are new since the last scan, and compiles the blocklist
+    only when the list of blocked apps changes.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._blocked_source = None
+        self._blocked = frozenset()
+
+    def _compile(self, blocked_apps):
+        """Rebuild the lowercase blocklist if it changed. Returns True if it did."""
+        source = tuple(blocked_apps)
+        if source == self._blocked_source:
+            return False
+        self._blocked_source = source
+        self._blocked = frozenset(app.lower() for app in source)
+        return True
+
+    def forget(self, pid):
+        """Drop a pid so the next scan treats it as new (e.g. after a failed kill)."""
+        self._names.pop(pid, None)
+
+    def scan(self, blocked_apps, full=False):
+        """
+        Return [(pid, name)] for blocked processes. Only pids started since the
+        last scan are checked, unless full is set or the blocklist changed.
+        """
+        if self._compile(blocked_apps):
+            full = True
+
+        pids = set(psutil.pids())
+        for pid in self._names.keys() - pids:
+            del self._names[pid]
+
+        new_pids = pids - self._names.keys()
+        for pid in new_pids:
+            try:
+                self._names[pid] = (psutil.Process(pid).name() or "").lower()
+            except psutil.NoSuchProcess:
+                continue
+            except psutil.AccessDenied:
+                self._names[pid] = ""
+
+        if not self._blocked:
+            return []
+        candidates = self._names if full else new_pids
+        return [(pid, self._names[pid]) for pid in candidates
+                if self._names.get(pid) in self._blocked]
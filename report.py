@@ -0,0 +1,83 @@
+# report.py
+"""
+Usage report for any date range, without the GUI.
+
+    python report.py --from 2026-09-01 --to 2026-09-30 --group-by app --top 10 --format csv
+
+The numbers come from logger.query(), i.e. the same per-day rollups and
+phase/cycle logic as the dashboard, so they match the GUI exactly. Only
+days whose rollup is missing or behind its segment read raw rows; those
+rollups are saved again so the next report is instant.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import date
+import logger
+
+GROUPS = ("app", "hour", "day", "phase", "title")
+
+def build_report(start_date, end_date, group_by="app", top_n=None):
+    """
+    Rows for [start_date, end_date] grouped by `group_by`, plus the totals.
+    top_n limits the app and title groupings (None: all of them).
+    """
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUPS)}")
+    aggregate = {"app": "top_apps", "title": "top_titles", "hour": "hourly", "day": "daily"}.get(group_by)
+    aggregates = ("phases", "cycles") + ((aggregate,) if aggregate else ())
+    result = logger.query(start_date, end_date, aggregates, top_n)
+
+    if group_by == "app":
+        rows = [{"app": app, "seconds": secs} for app, secs in result["top_apps"]]
+    elif group_by == "title":
+        rows = [{"title": title, "seconds": secs} for title, secs in result["top_titles"]]
+    elif group_by == "hour":
+        rows = [{"hour": hour, "seconds": sum(result["hourly"][hour].values())} for hour in range(24)]
+    elif group_by == "day":
+        rows = [dict({"day": day}, **phases, cycles=logger.cycles_for(phases["work"]))
+                for day, phases in sorted(result["daily"].items())]
+    else:
+        rows = [{"phase": phase, "seconds": secs} for phase, secs in result["phases"].items()]
+
+    totals = dict(result["phases"], cycles=result["cycles"])
+    return rows, totals
+
+def write_json(out, start_date, end_date, group_by, rows, totals):
+    json.dump({"from": start_date.isoformat(), "to": end_date.isoformat(), "group_by": group_by,
+               "rows": rows, "totals": totals}, out, indent=2)
+    out.write("\n")
+
+def write_csv(out, rows):
+    if not rows:
+        return
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Usage report for a date range.")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, help="first day, YYYY-mm-dd (default: --to)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=date.today(),
+                        help="last day, YYYY-mm-dd (default: today)")
+    parser.add_argument("--group-by", choices=GROUPS, default="app")
+    parser.add_argument("--top", type=int, help="only the top N apps or titles")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    args = parser.parse_args(argv)
+
+    start = args.start or args.end
+    if start > args.end:
+        parser.error("--from is after --to")
+
+    rows, totals = build_report(start, args.end, args.group_by, args.top)
+    # Keep the rollups this report had to bring up to date
+    logger.save_rollups()
+
+    if args.format == "json":
+        write_json(sys.stdout, start, args.end, args.group_by, rows, totals)
+    else:
+        write_csv(sys.stdout, rows)
+
+if __name__ == "__main__":
+    main()
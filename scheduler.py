@@ -0,0 +1,118 @@
+# scheduler.py
+"""
+One background thread for the app's periodic work.
+
+Jobs are registered with every(period, fn). Due times sit on a grid shared
+by all jobs (multiples of each job's period from one start time), so jobs
+with equal or harmonic periods come due together, and anything due within
+`coalesce` seconds of the earliest job runs in the same wakeup. The thread
+sleeps on a condition until the next due time, so cancel() and stop()
+take effect immediately instead of after a sleep.
+"""
+import heapq
+import itertools
+import threading
+import time
+import traceback
+import metrics
+
+class Job:
+    __slots__ = ("name", "period", "fn", "due", "cancelled")
+
+    def __init__(self, name, period, fn, due):
+        self.name = name
+        self.period = period
+        self.fn = fn
+        self.due = due
+        self.cancelled = False
+
+class Scheduler:
+    def __init__(self, coalesce=0.05, name="scheduler"):
+        self.coalesce = coalesce
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()  # tie-breaker, keeps registration order
+        self._stopped = False
+        self._origin = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def every(self, period, fn, name=None, delay=None):
+        """Run fn every `period` seconds, first after `delay` (default: the next grid point)."""
+        now = time.monotonic()
+        if delay is None:
+            due = self._origin + ((now - self._origin) // period + 1) * period
+        else:
+            due = now + delay
+        job = Job(name or fn.__name__, period, fn, due)
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def cancel(self, job):
+        with self._cond:
+            job.cancelled = True
+            self._cond.notify()
+
+    def stop(self, timeout=10):
+        """Stop after the job running now (if any) and wait for the thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        """Block until jobs are due; returns them, or None once stopped."""
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                wait = self._heap[0][0] - now
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                # Everything due now or within the coalescing window
+                batch = []
+                while self._heap and self._heap[0][0] <= now + self.coalesce:
+                    _, _, job = heapq.heappop(self._heap)
+                    if not job.cancelled:
+                        batch.append(job)
+                return batch
+
+    def _reschedule(self, job):
+        now = time.monotonic()
+        job.due += job.period
+        if job.due <= now:
+            # Overran: skip the missed runs rather than firing them back to back
+            job.due += ((now - job.due) // job.period + 1) * job.period
+        with self._cond:
+            if not job.cancelled:
+                heapq.heappush(self._heap, (job.due, next(self._seq), job))
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for job in batch:
+                if job.cancelled or self._stopped:
+                    continue
+                try:
+                    with metrics.timer(f"scheduler.{job.name}"):
+                        job.fn()
+                except Exception:
+                    # One failing job must not take the others down
+                    metrics.incr(f"scheduler.errors.{job.name}")
+                    traceback.print_exc()
+                self._reschedule(job)
@@ -0,0 +1,57 @@
+# sensors.py
+"""
+Shared sensor snapshot.
+
+SensorHub.sample() reads the idle time and the foreground window once and
+publishes them, together with the phase and pause flag, as one immutable
+Snapshot. The tracker, blocker, timer and GUI all read hub.snapshot rather
+than querying Windows and the state globals themselves, so each value is
+fetched once per period and every reader sees a consistent set.
+"""
+import threading
+import time
+from collections import namedtuple
+import state
+from config import AFK_TIMEOUT
+from idle_tracker import get_idle_duration
+from tracker import get_active_window_info
+
+class Snapshot(namedtuple("Snapshot", "taken idle app title phase paused")):
+    """One sample; `taken` is time.monotonic() when idle was read."""
+    __slots__ = ()
+
+    @property
+    def afk(self):
+        return self.phase == "work" and self.idle >= AFK_TIMEOUT
+
+    @property
+    def unscheduled(self):
+        return self.paused or self.afk
+
+    def idle_at(self, now):
+        """Idle time extrapolated to `now` (assumes no input since the sample)."""
+        return self.idle + max(0.0, now - self.taken)
+
+class SensorHub:
+    def __init__(self, get_idle=get_idle_duration, get_window=get_active_window_info):
+        self._get_idle = get_idle
+        self._get_window = get_window
+        self._lock = threading.Lock()
+        self.snapshot = Snapshot(time.monotonic(), 0.0, None, None, state.current_phase, state.paused)
+
+    def sample(self):
+        """Read the sensors and publish a new snapshot (scheduler job)."""
+        try:
+            idle = self._get_idle()
+        except Exception:
+            idle = 0.0
+        app, title = self._get_window()
+        # state is read under the lock so a concurrent refresh_state() never
+        # gets overwritten by an older phase or pause flag
+        with self._lock:
+            self.snapshot = Snapshot(time.monotonic(), idle, app, title, state.current_phase, state.paused)
+
+    def refresh_state(self):
+        """Republish after the phase or pause flag changed, without waiting for the next sample."""
+        with self._lock:
+            self.snapshot = self.snapshot._replace(phase=state.current_phase, paused=state.paused)
@@ -0,0 +1,274 @@
+# sqlite_store.py
+"""Optional SQLite backend for the usage log (config.LOG_BACKEND = "sqlite")."""
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from config import DB_PATH, LOG_DIR, LOG_DURABILITY
+from logformat import day_of, day_start, read_records
+from strtable import strings
+
+# Timestamps are stored as wall-clock epoch seconds (see logformat), the
+# same integers the CSV segments hold.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    ts_start      INTEGER NOT NULL,
+    ts_end        INTEGER NOT NULL,
+    duration_secs INTEGER NOT NULL,
+    app_name      TEXT NOT NULL,
+    window_title  TEXT NOT NULL,
+    phase         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_start ON usage(ts_start);
+CREATE INDEX IF NOT EXISTS idx_usage_app ON usage(app_name, ts_start);
+CREATE INDEX IF NOT EXISTS idx_usage_phase ON usage(phase, ts_start);
+-- Retention tiers (see compact): rows that leave usage are kept as
+-- day x app x phase totals forever and hour x app x phase for a while longer.
+-- Days imported from the CSV tiers only have app and phase totals apart:
+-- they are stored as (app, '') and ('', phase) rows.
+CREATE TABLE IF NOT EXISTS usage_daily (
+    day_start INTEGER NOT NULL,
+    app_name  TEXT NOT NULL,
+    phase     TEXT NOT NULL,
+    secs      INTEGER NOT NULL,
+    PRIMARY KEY (day_start, app_name, phase)
+);
+CREATE TABLE IF NOT EXISTS usage_hourly (
+    hour_start INTEGER NOT NULL,
+    app_name   TEXT NOT NULL,
+    phase      TEXT NOT NULL,
+    secs       INTEGER NOT NULL,
+    PRIMARY KEY (hour_start, app_name, phase)
+);
+CREATE TABLE IF NOT EXISTS imported (
+    path TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL
+);
+"""
+
+# One connection per thread; WAL lets the GUI read while the tracker writes.
+_local = threading.local()
+
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL survives an app crash in WAL mode; FULL also survives power loss
+        conn.execute("PRAGMA synchronous=NORMAL" if LOG_DURABILITY == "none" else "PRAGMA synchronous=FULL")
+        _local.conn = conn
+    return conn
+
+def init_db():
+    conn = _connect()
+    with conn:
+        conn.executescript(_SCHEMA)
+
+def insert_rows(records):
+    """Insert a flushed batch of logger records in a single transaction."""
+    if not records:
+        return 0
+    conn = _connect()
+    with conn:
+        conn.executemany("INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?)", records)
+    return len(records)
+
+def contains(record):
+    """Whether this exact row is already stored (journal replay)."""
+    row = _connect().execute(
+        "SELECT 1 FROM usage WHERE ts_start = ? AND ts_end = ? AND duration_secs = ?"
+        " AND app_name = ? AND window_title = ? AND phase = ? LIMIT 1", record).fetchone()
+    return row is not None
+
+# Every interval split on hour boundaries: (app_name, phase, s, e) pieces.
+# Expects the usage rows to be bounded by ? (lo) and ? (hi) on ts_start.
+_HOUR_PIECES = """
+    WITH RECURSIVE seg(app_name, phase, s, e) AS (
+        SELECT app_name, phase, ts_start, ts_end FROM usage
+         WHERE ts_start >= ? AND ts_start < ? AND ts_end > ts_start
+        UNION ALL
+        SELECT app_name, phase, s - s % 3600 + 3600, e FROM seg
+         WHERE s - s % 3600 + 3600 < e
+    )"""
+
+# Raw rows and per-day tier totals as (t, app_name, phase, secs)
+_TOTALS = """
+    (SELECT ts_start AS t, app_name, phase, duration_secs AS secs FROM usage
+      WHERE ts_start >= :lo AND ts_start < :hi
+     UNION ALL
+     SELECT day_start, app_name, phase, secs FROM usage_daily
+      WHERE day_start >= :lo AND day_start < :hi)"""
+
+def compact(raw_cutoff, hourly_cutoff):
+    """
+    Retention tiers (see logger.maybe_compact). Rows of days before the
+    raw_cutoff date are summed into usage_daily and usage_hourly and
+    deleted; usage_hourly rows before hourly_cutoff are deleted, leaving the
+    per-day totals. One transaction, so nothing is counted twice or lost.
+    """
+    raw = day_start(raw_cutoff)
+    conn = _connect()
+    with conn:
+        conn.execute(
+            "INSERT INTO usage_daily"
+            " SELECT ts_start - ts_start % 86400 AS d, app_name, phase, SUM(duration_secs) FROM usage"
+            " WHERE ts_start < ? GROUP BY d, app_name, phase"
+            " ON CONFLICT (day_start, app_name, phase) DO UPDATE SET secs = secs + excluded.secs", (raw,))
+        conn.execute(
+            "INSERT INTO usage_hourly" + _HOUR_PIECES +
+            " SELECT s - s % 3600 AS h, app_name, phase, SUM(MIN(e, s - s % 3600 + 3600) - s)"
+            " FROM seg WHERE 1 GROUP BY h, app_name, phase"
+            " ON CONFLICT (hour_start, app_name, phase) DO UPDATE SET secs = secs + excluded.secs", (0, raw))
+        conn.execute("DELETE FROM usage WHERE ts_start < ?", (raw,))
+        conn.execute("DELETE FROM usage_hourly WHERE hour_start < ?", (day_start(hourly_cutoff),))
+
+def query(start_date, end_date, aggregates, top_n=5):
+    """SQL version of logger.query(); returns the same raw aggregates."""
+    conn = _connect()
+    lo = day_start(start_date)
+    hi = day_start(end_date + timedelta(days=1))
+
+    bounds = {"lo": lo, "hi": hi}
+
+    result = {}
+    if "phases" in aggregates or "cycles" in aggregates:
+        phase_totals = {"work": 0, "break": 0, "unscheduled": 0}
+        for phase, secs in conn.execute(f"SELECT phase, SUM(secs) FROM {_TOTALS} GROUP BY phase", bounds):
+            if phase in phase_totals:
+                phase_totals[phase] = secs
+        result["phases"] = phase_totals
+
+    # LIMIT -1 means no limit
+    limit = top_n if top_n is not None else -1
+    if "top_apps" in aggregates:
+        result["top_apps"] = conn.execute(
+            f"SELECT app_name, SUM(secs) AS total FROM {_TOTALS} WHERE app_name != ''"
+            " GROUP BY app_name ORDER BY total DESC LIMIT :limit", dict(bounds, limit=limit)).fetchall()
+
+    if "top_titles" in aggregates:
+        result["top_titles"] = conn.execute(
+            "SELECT window_title, SUM(duration_secs) AS total FROM usage"
+            " WHERE ts_start >= ? AND ts_start < ?"
+            " GROUP BY window_title ORDER BY total DESC LIMIT ?", (lo, hi, limit)).fetchall()
+
+    if "daily" in aggregates:
+        daily = {}
+        for day_num, phase, secs in conn.execute(
+            f"SELECT t / 86400 AS day_num, phase, SUM(secs) FROM {_TOTALS}"
+            " GROUP BY day_num, phase ORDER BY day_num", bounds):
+            totals = daily.setdefault(day_of(day_num * 86400), {"work": 0, "break": 0, "unscheduled": 0})
+            if phase in totals:
+                totals[phase] = secs
+        result["daily"] = daily
+
+    if "hourly" in aggregates:
+        # Split every raw interval on hour boundaries, then sum per hour of
+        # day together with the hourly tier
+        hourly_usage = defaultdict(lambda: defaultdict(int))
+        for hour, app_name, secs in conn.execute(
+            _HOUR_PIECES +
+            " SELECT (s % 86400) / 3600 AS hour, app_name, SUM(MIN(e, s - s % 3600 + 3600) - s)"
+            " FROM seg GROUP BY hour, app_name", (lo, hi)):
+            hourly_usage[hour][app_name] += secs
+        for hour, app_name, secs in conn.execute(
+            "SELECT (hour_start % 86400) / 3600 AS hour, app_name, SUM(secs) FROM usage_hourly"
+            " WHERE hour_start >= ? AND hour_start < ? GROUP BY hour, app_name", (lo, hi)):
+            hourly_usage[hour][app_name] += secs
+        result["hourly"] = hourly_usage
+
+    return result
+
+def _import_file(conn, path, batch_size):
+    key = os.path.abspath(path)
+    if conn.execute("SELECT 1 FROM imported WHERE path = ?", (key,)).fetchone():
+        return 0
+
+    total = 0
+    with conn:
+        batch = []
+        for record in read_records(path):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?)", batch)
+                total += len(batch)
+                batch.clear()
+        if batch:
+            conn.executemany("INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?)", batch)
+            total += len(batch)
+        conn.execute("INSERT INTO imported VALUES (?, ?)", (key, total))
+    return total
+
+def _import_tiers(conn, path):
+    """
+    Import the CSV backend's retention tiers from directory `path`: frozen
+    YYYY-mm-dd.rollup.json days into usage_hourly and usage_daily, and
+    YYYY.daily.json archives into usage_daily. Each day is recorded under
+    its segment's path, so a day is imported once whichever tier it was in.
+    Returns the number of days added.
+    """
+    days = {}
+    names = sorted(os.listdir(path))
+    for name in names:
+        if name.endswith(".rollup.json"):
+            try:
+                with open(os.path.join(path, name), encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if isinstance(data, dict) and data.get("tier") == "hourly":
+                days[name[:10]] = data
+    for name in names:
+        if name.endswith(".daily.json"):
+            try:
+                with open(os.path.join(path, name), encoding="utf-8") as f:
+                    archive = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for day, totals in archive.items():
+                days.setdefault(day, dict(totals, hours=[]))
+
+    added = 0
+    with conn:
+        for day, data in sorted(days.items()):
+            key = os.path.abspath(os.path.join(path, day + ".csv"))
+            if conn.execute("SELECT 1 FROM imported WHERE path = ?", (key,)).fetchone():
+                continue
+            start = day_start(date.fromisoformat(day))
+            daily = [(start, "", phase, secs) for phase, secs in data["phases"].items()]
+            daily += [(start, strings.lookup(int(app)), "", secs) for app, secs in data["apps"].items()]
+            hourly = [(start + hour * 3600, strings.lookup(int(app)), phase, secs)
+                      for hour, apps in enumerate(data["hours"])
+                      for app, phases in apps.items() for phase, secs in phases.items()]
+            conn.executemany("INSERT INTO usage_daily VALUES (?, ?, ?, ?)"
+                             " ON CONFLICT (day_start, app_name, phase) DO UPDATE SET secs = secs + excluded.secs",
+                             daily)
+            conn.executemany("INSERT INTO usage_hourly VALUES (?, ?, ?, ?)"
+                             " ON CONFLICT (hour_start, app_name, phase) DO UPDATE SET secs = secs + excluded.secs",
+                             hourly)
+            conn.execute("INSERT INTO imported VALUES (?, ?)", (key, 0))
+            added += 1
+    return added
+
+def import_csv(path=LOG_DIR, batch_size=5000):
+    """
+    One-shot import of existing CSV logs: a usage_log.csv file or a directory
+    of daily segments, including the days already moved to the hourly and
+    per-day tiers. Files already imported are skipped. Returns rows added.
+    """
+    init_db()
+    conn = _connect()
+    if not os.path.isdir(path):
+        return _import_file(conn, path, batch_size)
+    paths = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".csv")]
+    total = sum(_import_file(conn, p, batch_size) for p in paths)
+    _import_tiers(conn, path)
+    return total
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1] if len(sys.argv) > 1 else LOG_DIR
+    print(f"Imported {import_csv(src)} rows from {src} into {DB_PATH}")
@@ -0,0 +1,141 @@
+# strtable.py
+"""
+Persistent string table for the usage log.
+
+App names and window titles repeat in nearly every row, so log records hold
+small integer ids and this table maps them back to text. The file is
+append-only CSV rows of (id, string); ids are handed out in order and never
+reused, so an id written to a segment stays valid for the life of the log.
+An id must be saved here before any row using it reaches disk. Entries
+lost to damage keep their ids as placeholders (rows of just the id), which
+look up as "#<id>".
+"""
+import csv
+import io
+import os
+import re
+import threading
+from config import STRINGS_PATH
+
+class StringTable:
+    def __init__(self, path=STRINGS_PATH):
+        self.reset(path)
+
+    def reset(self, path):
+        """Point the table at another file (loaded on first use)."""
+        self.path = path
+        self._lock = threading.Lock()       # the in-memory table; never held during file writes
+        self._save_lock = threading.Lock()  # one save() at a time, so appends stay in id order
+        self._loaded = False
+        self._ids = {}
+        self._strings = []
+        self._saved = 0       # entries already in the file
+        self._rewrite = False  # file is damaged: write it out whole next save
+
+    def _load(self):
+        """
+        Read the file once. Call with _lock held. The file is only read here,
+        even when damaged: save() writes out the repaired table later.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        # A torn last entry was never referenced by any row; drop it
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            self._rewrite = True
+        lines = data.count(b"\n", 0, end)
+        for values in csv.reader(io.StringIO(data[:end].decode("utf-8", errors="replace"), newline="")):
+            i = len(self._strings)
+            if values == [str(i)]:
+                self._strings.append(None)  # placeholder from an earlier repair
+                continue
+            if len(values) == 2 and values[0] == str(i):
+                self._ids.setdefault(values[1], i)
+                self._strings.append(values[1])
+                continue
+            # A damaged entry must not shift the ids after it: if its id is
+            # still readable it goes back there, otherwise it holds the next
+            # id as a placeholder.
+            self._rewrite = True
+            try:
+                j = int(values[0]) if len(values) == 2 else None
+            except ValueError:
+                j = None
+            if j is None or j < 0 or j > i + lines:
+                self._strings.append(None)
+            elif j < i:
+                if self._strings[j] is None:
+                    self._ids.setdefault(values[1], j)
+                    self._strings[j] = values[1]
+            else:
+                self._strings.extend([None] * (j - i))
+                self._ids.setdefault(values[1], j)
+                self._strings.append(values[1])
+        if len(self._strings) < lines:
+            # Some entry spans lines: a title with a newline, or an unclosed
+            # quote that swallowed the entries after it. Either way no id
+            # that starts a line may be handed out again.
+            top = max((int(i) for i in re.findall(rb"^(\d+),", data[:end], re.M) if int(i) < lines), default=-1)
+            if top >= len(self._strings):
+                self._rewrite = True
+                self._strings.extend([None] * (top + 1 - len(self._strings)))
+        self._saved = len(self._strings)
+        self._loaded = True
+
+    def intern(self, s):
+        """Id for s, assigning the next free one if it is new."""
+        i = self._ids.get(s)
+        if i is None:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                i = self._ids.get(s)
+                if i is None:
+                    i = self._ids[s] = len(self._strings)
+                    self._strings.append(s)
+        return i
+
+    def lookup(self, i):
+        """String for id i."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+        try:
+            s = self._strings[i]
+        except IndexError:
+            s = None
+        return f"#{i}" if s is None else s
+
+    def save(self, fsync=False):
+        """
+        Append the entries interned since the last save. The file is written
+        outside _lock, so intern() never waits for the write or the fsync.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._loaded or self._saved == len(self._strings):
+                    return
+                rewrite = self._rewrite
+                first = 0 if rewrite else self._saved
+                pending = self._strings[first:]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if rewrite:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerows([i] if s is None else [i, s] for i, s in enumerate(pending))
+                os.replace(tmp_path, self.path)
+            else:
+                with open(self.path, "a", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerows(enumerate(pending, first))
+                    if fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            with self._lock:
+                self._rewrite = False
+                self._saved = first + len(pending)
+
+strings = StringTable()
@@ -0,0 +1,55 @@
+# summary_worker.py
+import queue
+import threading
+from logger import dashboard_summary
+
+class SummaryWorker:
+    """
+    Computes dashboard summaries off the Tk thread.
+
+    request() never blocks: it records the latest wanted period and wakes
+    the worker. Only one refresh runs at a time, and a request that has not
+    started yet is replaced by a newer one. Finished results are put on
+    `results` as (period, (stats, top_apps, hourly_usage)) for the Tk loop
+    to poll; a failed refresh is reported as (period, None).
+    """
+
+    def __init__(self, compute=dashboard_summary):
+        self._compute = compute
+        self._cond = threading.Condition()
+        self._pending = None
+        self._stopped = False
+        self.results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="summary-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def request(self, period):
+        with self._cond:
+            # A newer request simply replaces one still waiting
+            self._pending = period
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                period, self._pending = self._pending, None
+            try:
+                result = self._compute(period)
+            except Exception:
+                # Keep the worker alive; the next refresh will try again
+                result = None
+            self.results.put((period, result))
+
+    def stop(self, timeout=2):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
@@ -1,55 +1,134 @@
 # timer.py
+"""
+Deadline-driven phase timer.
+
+Rather than counting 1 s ticks, the timer settles time_elapsed and
+overtime from a time.monotonic() mark whenever they are read, so a late or
+skipped callback never loses or gains time. sync() applies pause and AFK
+changes and sends the phase notifications, then returns how long until
+the next thing can happen so the GUI schedules a single wakeup for it.
+"""
+import threading
+import time
 import state
-from config import WORK_DURATION, BREAK_DURATION
+from config import AFK_TIMEOUT
 from notifier import notify
+import metrics
+
+_lock = threading.Lock()
+_mark = time.monotonic()  # elapsed and overtime are settled up to here
+_elapsed = 0.0            # active seconds in the current phase
+_overtime = float(state.overtime)
+_afk = False              # AFK as of the last sync()
 
-def tick(is_afk):
-    manual_pause = state.paused
-    afk_pause = is_afk() and state.current_phase == "work"
+def _running():
+    return not state.paused and not _afk
 
-    # Determine whether the timer should count
-    timer_paused = manual_pause or afk_pause
-    if not timer_paused:
-        state.time_elapsed += 1
+def _threshold():
+    """Active seconds after which the current phase runs into overtime."""
+    return state.WORK_DURATION if state.current_phase == "work" else state.BREAK_DURATION
 
-    # Overtime adjustments
-    if timer_paused:
+def _advance(now):
+    """Settle elapsed and overtime up to `now` under the current pause state. Call with _lock held."""
+    global _mark, _elapsed, _overtime
+    dt = now - _mark
+    if dt <= 0:
+        return
+    _mark = now
+
+    if not _running():
         # Overtime goes down by 1 per second when paused
-        state.overtime -= 1
+        _overtime -= dt
+    else:
+        before = _elapsed
+        _elapsed += dt
+        over = _elapsed - max(before, _threshold())
+        if over > 0:
+            if state.current_phase == "work":
+                # Overtime goes up at scaled rate
+                _overtime += over * state.BREAK_DURATION / state.WORK_DURATION
+            elif state.current_phase == "break":
+                # Overtime goes down by 1 per second after break ends
+                _overtime -= over
 
-    elif state.current_phase == "work":
-        if state.time_elapsed >= state.WORK_DURATION:
-            # Overtime goes up at scaled rate
-            state.overtime += state.BREAK_DURATION / state.WORK_DURATION
+    state.time_elapsed = int(_elapsed)
+    state.overtime = _overtime
 
-            if not state.notified:
-                msg = (
+@metrics.timed("timer.sync")
+def sync(idle=None):
+    """
+    Bring the timer up to date. `idle` is the seconds since the last user
+    input (None skips AFK detection). Returns the seconds until the next
+    deadline (phase end, notification or AFK check), or None if nothing
+    is due until the user does something.
+    """
+    global _afk
+    now = time.monotonic()
+    message = None
+    with _lock:
+        afk = idle is not None and state.current_phase == "work" and idle >= AFK_TIMEOUT
+        if afk != _afk:
+            # The change happened before this call: AFK began AFK_TIMEOUT
+            # after the last input and ends at the next input (or now, if
+            # it ended because the phase changed)
+            if afk:
+                _advance(now - (idle - AFK_TIMEOUT))
+            elif idle is not None and idle < AFK_TIMEOUT:
+                _advance(now - idle)
+            _afk = afk
+        _advance(now)
+
+        if _elapsed >= _threshold() and not state.notified:
+            if state.current_phase == "work":
+                message = (
                     "Work session complete! Take a break. Remember to transfer phases"
                     if not state.auto_phase else
                     "Work session complete! Taking a break automatically."
                 )
-                notify("Pomodoro Timer", msg)
-                state.notified = True
-
-    elif state.current_phase == "break":
-        if state.time_elapsed >= state.BREAK_DURATION:
-            # Overtime goes down by 1 per second after break ends
-            state.overtime -= 1
-
-            if not state.notified:
-                msg = (
+            elif state.current_phase == "break":
+                message = (
                     "Break over! Time to get back to work. Remember to transfer phases"
                     if not state.auto_phase else
                     "Break over! Starting next work session automatically."
                 )
-                notify("Pomodoro Timer", msg)
-                state.notified = True
+            state.notified = True
+
+        waits = []
+        if _running():
+            if state.phase_duration > _elapsed:
+                waits.append(state.phase_duration - _elapsed)
+            if not state.notified:
+                waits.append(_threshold() - _elapsed)
+        if idle is not None and state.current_phase == "work" and not state.paused:
+            # Going AFK is predictable; coming back (any input) is not, so poll
+            waits.append(1 if _afk else AFK_TIMEOUT - idle)
+
+    if message:
+        notify("Pomodoro Timer", message)
+    return max(0, min(waits)) if waits else None
+
+def set_paused(paused):
+    """Pause or resume, settling the time before the switch."""
+    with _lock:
+        _advance(time.monotonic())
+        state.paused = paused
+
+def get_overtime():
+    with _lock:
+        _advance(time.monotonic())
+        return _overtime
 
 def get_time_remaining():
-    remaining = state.phase_duration - state.time_elapsed
-    return max(0, remaining)
+    with _lock:
+        _advance(time.monotonic())
+        return max(0, state.phase_duration - _elapsed)
 
 def start_phase_timer(duration):
-    state.phase_duration = duration
-    state.time_elapsed = 0
-    state.notified = False
+    global _elapsed
+    with _lock:
+        # Overtime of the phase that just ended is kept
+        _advance(time.monotonic())
+        _elapsed = 0.0
+        state.phase_duration = duration
+        state.time_elapsed = 0
+        state.notified = False
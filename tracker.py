@@ -1,13 +1,15 @@
-import win32gui
-import win32process
 import psutil
 from datetime import datetime
-from logger import log_event, init_log, flush_buffer, maybe_compact
+from logger import log_event, init_log, start_writer, stop_writer
 import threading
 import time
+import metrics
 
 def get_active_window_info():
     try:
+        # Imported on first use, on the tracker thread rather than at startup
+        import win32gui
+        import win32process
         hwnd = win32gui.GetForegroundWindow()
         _, pid = win32process.GetWindowThreadProcessId(hwnd)
         process = psutil.Process(pid)
@@ -17,33 +19,81 @@ def get_active_window_info():
     except Exception:
         return None, None
 
-def track_foreground(get_phase, is_unscheduled_func, stop_event, interval=1, flush_interval=30):
-    init_log()
-    last_app, last_title = get_active_window_info()
-    last_phase = get_phase()
-    start_time = datetime.now()
-    last_flush = time.time()
-
-    while not stop_event.is_set():
-        stop_event.wait(interval)
-        if stop_event.is_set():
-            break
-
-        app, title = get_active_window_info()
-        phase = get_phase()
-        if is_unscheduled_func() and phase == "work":
+class ForegroundTracker:
+    """
+    Reads the sensor snapshot once per sample() call and logs how long each
+    app/title/phase stayed in front.
+
+    Consecutive identical samples are merged into one open interval
+    [open_start, start_time) that is only logged when the app, title or
+    phase changes, the day rolls over, or at a flush boundary.
+    """
+
+    def __init__(self, sensors, flush_interval=30):
+        self.sensors = sensors
+        self.flush_interval = flush_interval
+        self._opened = False
+        self.open_key = None
+        self.open_start = None
+        self.start_time = None
+
+    def open(self):
+        """
+        Set up the log and start the writer thread. Call once before the
+        scheduler starts: a log migration or rollup rebuild must not stall
+        the jobs that share its thread.
+        """
+        init_log()
+        # All disk writes happen on the writer thread from here on
+        start_writer()
+        self._opened = True
+
+    def _first_sample(self):
+        snap = self.sensors.snapshot
+        self.last_app, self.last_title = snap.app, snap.title
+        self.last_phase = snap.phase
+        self.start_time = datetime.now()
+        self.last_flush = time.time()
+
+    @metrics.timed("tracker.iteration")
+    def sample(self):
+        if self.start_time is None:
+            self._first_sample()
+            return
+
+        snap = self.sensors.snapshot
+        app, title = snap.app, snap.title
+        phase = snap.phase
+        if snap.unscheduled and phase == "work":
             phase = "unscheduled"
 
         end_time = datetime.now()
-        if last_app and last_title:
-            log_event(start_time, end_time, last_app, last_title, last_phase, paused=(phase=="unscheduled"))
+        start_time = self.start_time
+        if self.last_app and self.last_title:
+            key = (self.last_app, self.last_title, "unscheduled" if phase == "unscheduled" else self.last_phase)
+        else:
+            key = None
+        if key != self.open_key or (self.open_key and self.open_start.date() != start_time.date()):
+            if self.open_key:
+                log_event(self.open_start, start_time, *self.open_key)
+            self.open_key, self.open_start = key, start_time
 
-        last_app, last_title, last_phase, start_time = app, title, phase, end_time
+        self.last_app, self.last_title, self.last_phase, self.start_time = app, title, phase, end_time
 
-        # Periodic flush & rare compaction (both are quick now)
-        if time.time() - last_flush >= flush_interval:
-            flush_buffer()
-            maybe_compact()
-            last_flush = time.time()
+        # Periodically hand the open interval to the writer so a long
+        # stretch in one window still reaches the log
+        if time.time() - self.last_flush >= self.flush_interval:
+            if self.open_key:
+                log_event(self.open_start, self.start_time, *self.open_key)
+                self.open_start = self.start_time
+            self.last_flush = time.time()
 
-    flush_buffer()
+    def close(self):
+        """Log the open interval and stop the writer (after the last sample)."""
+        if not self._opened:
+            return
+        if self.open_key:
+            log_event(self.open_start, self.start_time, *self.open_key)
+            self.open_key = None
+        stop_writer()
+        self._opened = False
@@ -0,0 +1,132 @@
+# watchdog.py
+"""
+Tk event-loop lag watchdog.
+
+GUI callbacks are scheduled through LoopWatchdog.after() instead of
+root.after(), which remembers when each one is due. A background thread
+checks those deadlines: if a callback is more than WATCHDOG_LAG_MS late the
+Tk loop is stuck, and the stacks of every thread are appended to a rotating
+file in DIAGNOSTICS_DIR while the stall is still happening. How late each
+callback actually ran is kept in a per-callback histogram.
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from config import WATCHDOG_ENABLED, WATCHDOG_LAG_MS, DIAGNOSTICS_DIR
+import metrics
+
+DUMP_FILE = "watchdog.log"
+MAX_BYTES = 1024 * 1024
+BACKUPS = 3
+
+def _rotate(path):
+    try:
+        if os.path.getsize(path) < MAX_BYTES:
+            return
+    except OSError:
+        return
+    for i in range(BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+def format_stacks():
+    """Stacks of all live threads, labelled with their names."""
+    names = {t.ident: t.name for t in threading.enumerate()}
+    lines = []
+    for ident, frame in sys._current_frames().items():
+        lines.append(f"--- thread {names.get(ident, '?')} ({ident}) ---\n")
+        lines.extend(traceback.format_stack(frame))
+    return "".join(lines)
+
+class LoopWatchdog:
+    def __init__(self, root, threshold_ms=WATCHDOG_LAG_MS, directory=DIAGNOSTICS_DIR, enabled=WATCHDOG_ENABLED):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.path = os.path.join(directory, DUMP_FILE)
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+        # name -> [due (monotonic), already reported]
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+
+    def start(self):
+        if self.enabled:
+            self._thread.start()
+        return self
+
+    def after(self, ms, name, callback):
+        """root.after(ms, callback), with the callback's lateness tracked under `name`."""
+        if not self.enabled:
+            return self.root.after(ms, callback)
+        due = time.monotonic() + ms / 1000
+        with self._lock:
+            self._pending[name] = [due, False]
+
+        def run():
+            lag_ms = max(0.0, time.monotonic() - due) * 1000
+            with self._lock:
+                self._pending.pop(name, None)
+                hist = self.histograms.get(name)
+                if hist is None:
+                    hist = self.histograms[name] = metrics.Histogram()
+                hist.observe(lag_ms)
+            metrics.observe(f"gui.lag.{name}", lag_ms)
+            callback()
+        return self.root.after(ms, run)
+
+    def cancel(self, name, after_id):
+        """root.after_cancel() for a callback scheduled with after()."""
+        with self._lock:
+            self._pending.pop(name, None)
+        self.root.after_cancel(after_id)
+
+    def _run(self):
+        interval = max(0.1, self.threshold / 4)
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            late = []
+            with self._lock:
+                for name, entry in self._pending.items():
+                    if not entry[1] and now - entry[0] > self.threshold:
+                        entry[1] = True
+                        late.append((name, (now - entry[0]) * 1000))
+            if late:
+                self._dump(late)
+
+    def _dump(self, late):
+        what = ", ".join(f"{name} {lag:.0f} ms late" for name, lag in late)
+        text = (
+            f"=== {datetime.now().isoformat(timespec='seconds')} Tk loop stalled: {what} ===\n"
+            f"{format_stacks()}"
+            f"{self._format_histograms()}\n"
+        )
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            _rotate(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(text)
+        except OSError:
+            pass
+
+    def _format_histograms(self):
+        with self._lock:
+            snaps = {name: hist.snapshot() for name, hist in self.histograms.items()}
+        lines = []
+        for name, snap in sorted(snaps.items()):
+            buckets = " ".join(f"{k[3:]}:{n}" for k, n in snap["buckets"].items() if n)
+            lines.append(f"lag {name}: n={snap['count']} mean={snap['mean']:.1f}ms max={snap['max']:.0f}ms [{buckets}]\n")
+        return "".join(lines)
+
+    def stop(self):
+        """Stop watching; call before cancelling the tracked callbacks."""
+        self._stop.set()
+        with self._lock:
+            self._pending.clear()
+        if self._thread.is_alive():
+            self._thread.join()